@@ -1,5 +1,6 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 import pandas as pd
 import numpy as np
@@ -10,25 +11,46 @@ from flask_jwt_extended import JWTManager, create_access_token, jwt_required, ge
 
 # DB 관련
 from extensions import mongo
-from user_utils import username_exists, email_exists, create_user, get_user_by_username, check_user_password
+from user_utils import create_user, get_user_by_username, check_user_password, duplicate_field, import_users
+from travel_cache import travel_cache
+from rating_utils import parse_rating_item, write_ratings
+from user_profiles import UserProfileStore
+from db_indexes import ensure_indexes, users_unique_ready
+from password_pool import password_hasher, TooManyAttempts
+from fast_json import dumps as json_bytes
+from pagination import keyset_pipeline, split_page, InvalidCursor
 
 # 모델 관련 라이브러리
 import joblib, os
+import json
+import click
+import atexit
+import logging
+import time
 
 # MongoDB _id 검색 위해 문자열을 ObjectId로 변환(변환 실패시 에러 반환)
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 # 여행지 추천 시스템 GangwonPlaceRecommender 클래스  파일 읽어오기
 from project_root1.recommend_module import GangwonPlaceRecommender
+from project_root1.artifacts import load_recommender_mmap, load_recommender_bundle
+from project_root1.inference_pool import InferencePool, PoolOverloaded, InferenceTimeout
 
-# 지도URL
-from urllib.parse import quote
 
+# 로그 레벨 (요청마다 찍던 디버그 로그는 LOG_LEVEL=DEBUG 일 때만 포맷/출력)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("app")
 
 # 앱초기화
 app = Flask(__name__)
 CORS(app) # 프론트에서 접근 가능하게 허용(모든 도메인 허용 - 개발용)
 app.config.from_object(Config)
+# 프록시 뒤에서는 모든 요청의 remote_addr 가 프록시 주소 → X-Forwarded-For 의 클라이언트 IP 사용
+# (/login 의 IP 별 동시 처리 제한이 전체 제한이 되지 않도록)
+if app.config["PROXY_FIX_X_FOR"] > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
 
 
 # DB 연동 환경변수
@@ -40,14 +62,41 @@ print("DEBUG env MONGO_URI =", os.environ.get("MONGO_URI"))
 print("DEBUG conf MONGO_URI =", app.config.get("MONGO_URI"))
 
 
+# 비밀번호 해시/검증 프로세스 풀 (/signup, /login) - 요청 스레드에서 PBKDF2 를 돌리지 않음
+password_hasher.configure(
+    method=app.config["PASSWORD_HASH_METHOD"],
+    workers=app.config["PASSWORD_POOL_WORKERS"],
+    max_queue=app.config["PASSWORD_POOL_QUEUE"],
+    timeout_seconds=app.config["PASSWORD_POOL_TIMEOUT"],
+    per_ip_limit=app.config["LOGIN_CONCURRENCY_PER_IP"],
+    per_user_limit=app.config["LOGIN_CONCURRENCY_PER_USER"],
+)
+atexit.register(password_hasher.shutdown)
+# python app.py (개발 서버): MongoDB 클라이언트의 모니터 스레드가 생기기 전에 fork
+# (gunicorn 은 gunicorn.conf.py 의 post_fork 에서 시작)
+if __name__ == "__main__":
+    password_hasher.start()
+
 mongo.init_app(app) 
 jwt = JWTManager(app)
 
+
+
+def auth_busy_response(e):
+    # 동시 로그인 제한(429) / 해시 풀 과부하(503) / 제한 시간 초과(504)
+    if isinstance(e, TooManyAttempts):
+        status = 429
+    else:
+        status = 504 if isinstance(e, InferenceTimeout) else 503
+    resp = jsonify({"error": "요청이 많습니다. 잠시 후 다시 시도해주세요."})
+    resp.headers["Retry-After"] = "1"
+    return resp, status
+
 # 전역 JSON 검사
 @app.before_request
 def enforce_json_for_api():
     # JSON 바디를 요구하는 엔드포인트만 제한
-    json_required_paths = {"/signup", "/login", "/rating", "/recommend"}
+    json_required_paths = {"/signup", "/login", "/rating", "/ratings/bulk", "/recommend", "/recommend/batch"}
     if request.path in json_required_paths and request.method == "POST":
         if not request.is_json:
             return jsonify({"error": "Content-Type must be application/json"}), 415
@@ -69,14 +118,52 @@ def signup():
     if not username or not email or not password or not name:
         return jsonify({'error': '모든 값을 입력해주세요.'}), 400
     
-    if username_exists(username):
+    # 아이디/이메일 중복은 unique 인덱스로 판단 (insert 한 번, 동시 가입 경쟁 없음)
+    try:
+        user_id = create_user(username, email, password, name)
+    except DuplicateKeyError as e:
+        if duplicate_field(e) == "email":
+            return jsonify({'error': '이미 존재하는 이메일입니다.'}), 409
         return jsonify({'error': '이미 존재하는 아이디입니다.'}), 409
+    except (PoolOverloaded, InferenceTimeout) as e:
+        return auth_busy_response(e)
+    return jsonify({'message': '사용자가 성공적으로 생성되었습니다.', 'user_id': user_id}), 201
 
-    if email_exists(email):
-        return jsonify({'error': '이미 존재하는 이메일입니다.'}), 409
 
-    user_id = create_user(username, email, password, name)
-    return jsonify({'message': '사용자가 성공적으로 생성되었습니다.', 'user_id': user_id}), 201
+
+# 계정 일괄 가져오기 (운영자용 CLI)
+#   flask --app wsgi import-users users.json   (JSON 배열 또는 한 줄에 하나씩 JSON lines)
+@app.cli.command("import-users")
+@click.argument("path")
+def import_users_command(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    records = json.loads(text) if text.startswith("[") else [json.loads(l) for l in text.splitlines() if l.strip()]
+    ensure_indexes()  # unique 인덱스가 있어야 중복 계정이 걸러짐
+    if not users_unique_ready():
+        raise click.ClickException("users 의 username/email unique 인덱스가 없습니다. 중복 계정을 정리한 뒤 다시 실행하세요.")
+    result = import_users(records)
+    print(f"[INFO] users imported: {result['inserted']}/{len(records)}, "
+          f"duplicates: {len(result['duplicates'])}, invalid: {len(result['invalid'])}")
+    for d in result["duplicates"]:
+        print(f"  duplicate #{d['index']}: {d['field']}")
+    for i in result["invalid"]:
+        print(f"  invalid #{i}: username/email/name/password 필요")
+
+
+
+# 사용자 프로필 재계산 (임베딩/카탈로그 교체 후, 또는 기존 별점 이력 반영)
+#   flask --app wsgi rebuild-profiles [USER_ID ...]   (생략하면 별점/북마크가 있는 모든 사용자)
+@app.cli.command("rebuild-profiles")
+@click.argument("user_ids", nargs=-1)
+def rebuild_profiles_command(user_ids):
+    if user_ids:
+        oids = [ObjectId(u) for u in user_ids]
+    else:
+        oids = set(mongo.db.ratings.distinct("user_id")) | set(mongo.db.bookmarks.distinct("user_id"))
+    for oid in oids:
+        profile = profile_store.rebuild(oid)
+        print(f"[INFO] profile {oid}: weight {profile.weight:.1f}, places {len(set(profile.ratings) | profile.bookmarks)}")
 
 
 # 로그인
@@ -89,10 +176,15 @@ def login():
     if not username or not password:
         return jsonify({'error': '아이디와 비밀번호를 입력해주세요.'}), 400
 
-    user = get_user_by_username(username)
-    
-    if not user or not check_user_password(user, password):
-        return jsonify({'error': '아이디 또는 비밀번호 오류'}), 401
+    # 같은 IP / 아이디의 동시 검증 수 제한 (무차별 대입이 해시 풀을 독점하지 않게)
+    try:
+        with password_hasher.limit(ip=request.remote_addr, username=username):
+            user = get_user_by_username(username)
+
+            if not user or not check_user_password(user, password):
+                return jsonify({'error': '아이디 또는 비밀번호 오류'}), 401
+    except (TooManyAttempts, PoolOverloaded, InferenceTimeout) as e:
+        return auth_busy_response(e)
 
     # JWT 발급
     access_token = create_access_token(identity=str(user['_id']))
@@ -113,41 +205,18 @@ def mypage():
     if not user:
         return jsonify({"error": "사용자를 찾을 수 없습니다."}), 404
 
-    # ratings 호출
-    cur = mongo.db.ratings.find({"user_id": current_user_id}).sort("updated_at", -1)
-    rating_list = list(cur)
-
-    # travel_id 목록 추출
-    travel_ids = [r.get("travel_id") for r in rating_list if r.get("travel_id")]
-
-    # 여행지 메타 조인 (추가된 필드 포함)
-    travel_docs = list(mongo.db.travels.find(
-        {"travel_id": {"$in": travel_ids}},
-        {
-            "_id": 0,
-            "travel_id": 1,
-            "name": 1,
-            "image_urls": 1,
-            "location": 1,
-            "address": 1,                # optional
-            "short_description": 1       # optional
-        }
-    ))
-    tmap = {d["travel_id"]: d for d in travel_docs}
+    # ratings 한 페이지 (updated_at 최신순, ?limit=&cursor=)
+    try:
+        limit, cursor = page_args()
+        rating_list, next_cursor, metas = fetch_page(mongo.db.ratings, {"user_id": current_user_id},
+                                                      "updated_at", cursor, limit)
+    except (ValueError, InvalidCursor) as e:
+        return jsonify({"error": str(e)}), 400
 
     ratings = []
-    for r in rating_list:
-        meta = tmap.get(r["travel_id"], {})
+    for r, meta in zip(rating_list, metas):
         loc = meta.get("location", {})
-
-        # 썸네일(첫번째 이미지) 처리
-        raw = meta.get("image_urls")
-        if isinstance(raw, list) and raw:
-            thumbnail = raw[0]
-        elif isinstance(raw, str) and raw.strip():
-            thumbnail = raw.split(",")[0].strip()
-        else:
-            thumbnail = None
+        raw = meta.get("image_urls_raw")
 
         ratings.append({
             "id": str(r["_id"]),
@@ -177,10 +246,43 @@ def mypage():
         "username": user['username'],
         "email": user['email'],
         "message": f"{user['username']}님의 마이페이지입니다!",
-        "ratings": ratings
+        "ratings": ratings,
+        "next_cursor": next_cursor
     }), 200
 
 
+# 마이페이지 목록 페이지네이션 (/mypage, /mypage/bookmarks)
+def page_args():
+    limit = request.args.get("limit", app.config["MYPAGE_PAGE_SIZE"])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit은 정수여야 합니다.")
+    if not (1 <= limit <= app.config["MYPAGE_PAGE_MAX"]):
+        raise ValueError(f"limit은 1~{app.config['MYPAGE_PAGE_MAX']} 사이여야 합니다.")
+    return limit, request.args.get("cursor") or None
+
+
+def fetch_page(collection, match, sort_field, cursor, limit):
+    """
+    키셋 페이지 1개 + 여행지 메타 → (문서 목록, 다음 cursor, 메타 목록)
+    메타는 travel_cache 에서 찾고, 캐시가 비어 있으면 (부팅 시 적재 실패) 같은 aggregation 의 $lookup 으로 가져온다.
+    """
+    lookup = not travel_cache.loaded
+    docs = list(collection.aggregate(keyset_pipeline(match, sort_field, cursor, limit, lookup=lookup)))
+    page, next_cursor = split_page(docs, sort_field, limit)
+
+    if lookup:
+        metas = []
+        for d in page:
+            m = d.get("meta") or {}
+            metas.append(dict(m, image_urls_raw=m.get("image_urls"), location=m.get("location") or {}))
+    else:
+        tmap = travel_cache.get_many([d.get("travel_id") for d in page if d.get("travel_id")])
+        metas = [tmap.get(d.get("travel_id"), {}) for d in page]
+    return page, next_cursor, metas
+
+
 
 
 # ==================================================================================
@@ -198,14 +300,33 @@ EMBEDDING_NPY = os.path.join(PROJECT_ROOT, "place_embeddings_v2.npy")
 # 초기
 recommender = GangwonPlaceRecommender(config_path=CONFIG_PATH)
 
+# 로딩 방식
+#   csv    : (기본) 워커마다 CSV/npy 로딩
+#   mmap   : 공유 번들 디렉터리를 mmap 으로 열어 워커 간 메모리 공유 (없으면 CSV에서 자동 빌드)
+#   bundle : 미리 빌드한 번들만 로딩, CSV 파싱 없음 (python -m project_root1.build_bundle)
+SERVING_CONF = recommender.config.get("serving", {})
+LOAD_MODE = os.environ.get("RECOMMENDER_LOAD_MODE", SERVING_CONF.get("load_mode", "csv"))
+ARTIFACT_DIR = os.environ.get(
+    "RECOMMENDER_ARTIFACT_DIR",
+    os.path.join(PROJECT_ROOT, SERVING_CONF.get("artifact_dir", "artifacts/serving"))
+)
+
 # 모델/ 데이터 로딩
 try:
-    recommender.df = pd.read_csv(PROCESSED_CSV).reset_index(drop=True)
-    recommender.place_embeddings = np.load(EMBEDDING_NPY)
+    if LOAD_MODE == "bundle":
+        load_recommender_bundle(recommender, ARTIFACT_DIR, verify=SERVING_CONF.get("verify_bundle", True))
+    elif LOAD_MODE == "mmap":
+        load_recommender_mmap(recommender, PROCESSED_CSV, EMBEDDING_NPY, ARTIFACT_DIR)
+    else:
+        recommender.df = pd.read_csv(PROCESSED_CSV).reset_index(drop=True)
+        recommender.place_embeddings = np.load(EMBEDDING_NPY)
 except Exception as e:
     print("[WARN] 추천기 초기 로딩 실패.", e)
 
 try:
+    print("[BOOT] load mode:", LOAD_MODE)
+    if recommender.bundle is not None:
+        print("[BOOT] serving bundle version:", recommender.bundle.version)
     print("[BOOT] df loaded rows:", len(recommender.df) if getattr(recommender, "df", None) is not None else 0)
     print("[BOOT] df has 'travel_id':", bool(getattr(recommender, "df", None) is not None and "travel_id" in list(recommender.df.columns)))
     if getattr(recommender, "place_embeddings", None) is not None:
@@ -215,171 +336,284 @@ try:
 except Exception as e:
     print("[BOOT] startup check failed:", e)
 
+# SBERT 는 기본적으로 첫 유사도 요청 때 로딩 (auth/북마크만 쓰는 스크립트·테스트는 로딩 비용 없음)
+# 운영: RECOMMENDER_PRELOAD=1 이면 부팅 시 모델을 미리 로딩 (gunicorn preload_app 이면 fork 전에 master 에서 1회)
+if os.environ.get("RECOMMENDER_PRELOAD", "0") == "1":
+    try:
+        recommender.load_embedder()
+    except Exception as e:
+        print("[WARN] SBERT preload failed:", e)
+
+# 쿼리 임베딩 캐시: 설정된 경우 종료 시 디스크에 저장 → 재시작한 워커가 warm 상태로 시작
+print("[BOOT] query cache entries:", len(recommender.query_cache))
+atexit.register(recommender.query_cache.save)
+
+# 컬렉션 인덱스 (ratings/bookmarks 의 (user_id, travel_id) upsert 조회용)
+try:
+    with app.app_context():
+        print("[BOOT] indexes:", ensure_indexes())
+        if not users_unique_ready():
+            print("[WARN] users unique indexes missing: signup falls back to find_one duplicate checks")
+except Exception as e:
+    print("[WARN] ensure_indexes failed:", e)
+
+# 여행지 메타 캐시: travels 를 부팅 시 한 번에 적재 (gunicorn preload 면 master 에서 1회, 워커는 공유)
+travel_cache.check_seconds = app.config["TRAVEL_CACHE_CHECK_SECONDS"]
+travel_cache.change_stream = app.config["TRAVEL_CACHE_CHANGE_STREAM"]
+try:
+    with app.app_context():
+        print("[BOOT] travel meta cache entries:", travel_cache.refresh())
+except Exception as e:
+    print("[WARN] travel meta cache preload failed (첫 요청 때 다시 시도):", e)
+
+# 추론 전용 제한 풀: /recommend 의 SBERT encode·점수 계산은 여기서만 실행
+# 실행+대기 한도를 넘으면 503, 제한 시간을 넘으면 504 로 바로 응답 (요청 스레드가 무한정 쌓이지 않게)
+INFERENCE_CONF = SERVING_CONF.get("inference", {}) or {}
+inference_pool = InferencePool(
+    workers=int(os.environ.get("RECOMMENDER_INFERENCE_WORKERS", INFERENCE_CONF.get("workers", 2))),
+    max_queue=int(os.environ.get("RECOMMENDER_INFERENCE_QUEUE", INFERENCE_CONF.get("max_queue", 16))),
+    timeout_seconds=float(os.environ.get("RECOMMENDER_INFERENCE_TIMEOUT", INFERENCE_CONF.get("timeout_seconds", 10))),
+)
+print("[BOOT] inference pool:", inference_pool.stats())
+
+# 단계별 지연시간 (추천기 내부 단계 + travels 조인/응답 생성) → /metrics
+stage_metrics = recommender.metrics
+
+# 사용자 선호 프로필: 별점/북마크 쓸 때 점진 갱신, /recommend 에서 로그인 유저면 점수에 섞음
+profile_store = UserProfileStore(recommender)
+
+
+def overloaded_response(e):
+    # 과부하(503) / 제한 시간 초과(504) - 클라이언트는 Retry-After 후 재시도
+    status = 504 if isinstance(e, InferenceTimeout) else 503
+    resp = jsonify({"error": "추천 서버가 혼잡합니다. 잠시 후 다시 시도해주세요.", "detail": str(e)})
+    resp.headers["Retry-After"] = "1"
+    return resp, status
+
+
+# 로그인 유저의 설문 태그(DB) 조회
+def get_survey_tags(user_id):
+    if not user_id:
+        return []
+    try:
+        doc = mongo.db.user_tags.find_one(
+            {"user_id": ObjectId(user_id)},
+            {"_id": 0, "tags": 1}
+        )
+        if doc and doc.get("tags"):
+            return doc["tags"]
+    except Exception as e:
+        print("[WARN] user_tags 議고쉶 �ㅽ뙣:", e)
+    return []
+
+
+# 요청 body → 모델 입력(data_for_model), mode 결정
+def build_model_input(body, user_tags):
+    # 우선순위 1: free_text가 있으면 그대로 사용
+    if isinstance(body.get("free_text"), str) and body["free_text"].strip():
+        return {"free_text": body["free_text"].strip()}, "free_text"
+
+    # 우선순위 2: 카테고리별로 구분된 태그가 있으면 그대로 전달
+    if any(body.get(k) for k in ['season', 'nature', 'vibe', 'target']):
+        data_for_model = {
+            k: body.get(k, [])
+            for k in ['season', 'nature', 'vibe', 'target']
+            if body.get(k)
+        }
+        logger.debug("Categorized tags received: %s", data_for_model)
+        return data_for_model, "categorized_tags"
+
+    # 우선순위 3: 단순 태그 리스트가 있으면 free_text로 변환
+    if isinstance(body.get("tags"), list) and body["tags"]:
+        norm = [str(t).strip().lstrip("#").lower() for t in body["tags"] if str(t).strip()]
+        # ✅ 수정: 태그를 free_text로 변환 (모델이 parse_free_text()로 자동 분류)
+        data_for_model = {"free_text": " ".join(norm)}
+        logger.debug("Converting tags to free_text: %s", data_for_model)
+        return data_for_model, "tags_as_text"
+
+    # 우선순위 4: DB에 저장된 설문 태그
+    if user_tags:
+        # ✅ 수정: 설문 태그도 free_text로 변환
+        data_for_model = {"free_text": " ".join(user_tags)}
+        logger.debug("Using survey tags as free_text: %s", data_for_model)
+        return data_for_model, "survey"
+
+    # 아무 입력도 없으면 빈 딕셔너리
+    return {}, "fallback"
+
+
+# 여행지 메타 조인 (travel_id → 캐시 항목, 캐시에 없을 때만 DB 조회)
+def fetch_travel_meta(travel_ids):
+    return travel_cache.get_many(travel_ids)
+
+
+# 추천 결과 → 응답 R1 형태의 JSON 배열 (bytes)
+# 장소별 고정 부분(travel_id, name, image_urls, location, map_url)은 캐시 적재 때 직렬화해 둔
+# fragment 를 그대로 쓰고, 요청마다 달라지는 scores 만 직렬화해서 이어 붙인다
+def render_recommendations(recs, tmap):
+    parts = []
+    for r in recs:
+        meta = tmap.get(r["travel_id"])
+        if not meta:
+            continue
+        scores = {
+            "hybrid": r.get("hybrid_score"),
+            "similarity": r.get("similarity_score"),
+            "tag_match": r.get("tag_score")
+        }
+        if r.get("personal_score") is not None:
+            scores["personal"] = r["personal_score"]
+        parts.append(meta["fragment"] + b',"scores":' + json_bytes(scores) + b"}")
+    return b"[" + b",".join(parts) + b"]"
+
+
+def json_response(body, status=200):
+    return Response(body, status=status, mimetype="application/json")
+
+
+def get_optional_user_id():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
 
-# 지도 URL 자동생성(클릭하면 카카오맵 오픈)
-def build_map_url(name, lat, lng):
-    enc_name = quote(name or "", safe="")
-    return f"https://map.kakao.com/link/map/{enc_name},{lat},{lng}"
+# 로그인 유저의 선호 프로필 벡터 (user_profiles 에서 _id 로 1건 조회)
+def get_profile_vector(user_id):
+    if not user_id:
+        return None
+    try:
+        return profile_store.get_vector(ObjectId(user_id))
+    except Exception as e:
+        print("[WARN] user profile lookup failed:", e)
+        return None
 
 
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
+    t_start = time.perf_counter()
     try:
         body = request.get_json(silent=True) or {}
 
         # 1) 로그인 유저 확인
-        user_id = None
-        try:
-            verify_jwt_in_request(optional=True)
-            user_id = get_jwt_identity()
-        except Exception:
-            user_id = None
+        user_id = get_optional_user_id()
 
         # 2) 설문태그(DB)
-        user_tags = []
-        if user_id:
-            try:
-                doc = mongo.db.user_tags.find_one(
-                    {"user_id": ObjectId(user_id)},
-                    {"_id": 0, "tags": 1}
-                )
-                if doc and doc.get("tags"):
-                    user_tags = doc["tags"]
-            except Exception as e:
-                print("[WARN] user_tags 議고쉶 �ㅽ뙣:", e)
+        user_tags = get_survey_tags(user_id)
 
         # 3) 입력 우선순위 결정
-        data_for_model = {}
-        mode = "fallback"
-
-        # 우선순위 1: free_text가 있으면 그대로 사용
-        if isinstance(body.get("free_text"), str) and body["free_text"].strip():
-            data_for_model = {"free_text": body["free_text"].strip()}
-            mode = "free_text"
-
-        # 우선순위 2: 카테고리별로 구분된 태그가 있으면 그대로 전달
-        elif any(body.get(k) for k in ['season', 'nature', 'vibe', 'target']):
-            data_for_model = {
-                k: body.get(k, [])
-                for k in ['season', 'nature', 'vibe', 'target']
-                if body.get(k)
-            }
-            mode = "categorized_tags"
-            print(f"[INFO] Categorized tags received: {data_for_model}")
-
-        # 우선순위 3: 단순 태그 리스트가 있으면 free_text로 변환
-        elif isinstance(body.get("tags"), list) and body["tags"]:
-            norm = [str(t).strip().lstrip("#").lower() for t in body["tags"] if str(t).strip()]
-            # ✅ 수정: 태그를 free_text로 변환 (모델이 parse_free_text()로 자동 분류)
-            data_for_model = {"free_text": " ".join(norm)}
-            mode = "tags_as_text"
-            print(f"[INFO] Converting tags to free_text: {data_for_model}")
-
-        # 우선순위 4: DB에 저장된 설문 태그
-        elif user_tags:
-            # ✅ 수정: 설문 태그도 free_text로 변환
-            data_for_model = {"free_text": " ".join(user_tags)}
-            mode = "survey"
-            print(f"[INFO] Using survey tags as free_text: {data_for_model}")
-
-        # 아무 입력도 없으면 빈 딕셔너리
-        else:
-            data_for_model = {}
-            mode = "fallback"
+        data_for_model, mode = build_model_input(body, user_tags)
+
+        # 별점/북마크 프로필 (없으면 None → 기존 추천 + 결과 캐시)
+        profile = get_profile_vector(user_id)
+
+        # 페이지네이션: offset 순위부터 3개
+        try:
+            offset = int(body.get("offset", 0))
+        except (TypeError, ValueError):
+            return jsonify({"error": "offset은 정수여야 합니다."}), 400
+        if offset < 0:
+            return jsonify({"error": "offset은 0 이상이어야 합니다."}), 400
 
         # ✅ 디버깅 로그 추가
-        print(f"[DEBUG] Mode: {mode}")
-        print(f"[DEBUG] data_for_model: {data_for_model}")
+        logger.debug("Mode: %s", mode)
+        logger.debug("data_for_model: %s", data_for_model)
 
 
         # 4) 추천 수행
-        result = recommender.recommend_places(data_for_model, top_k=3)
+        # categorized_tags 는 tag_only 요청 시 SBERT 없이 태그 점수만으로 추천
+        tag_only = mode == "categorized_tags" and bool(body.get("tag_only", recommender.tag_only_categorized))
+
+        try:
+            result = inference_pool.run(recommender.recommend_places, data_for_model,
+                                        top_k=3, offset=offset, tag_only=tag_only, profile=profile)
+        except (PoolOverloaded, InferenceTimeout) as e:
+            return overloaded_response(e)
         recs = result.get("recommendations", [])[:3]
 
         # 디버깅 로그
-        print(f"[DEBUG] Number of recommendations: {len(recs)}")
-        if recs:
-            print(f"[DEBUG] First rec tag_score: {recs[0].get('tag_score')}")
-        #상위 결과 비교(최대 10개)
-        for idx, r in enumerate(recs[:10]):  # 상위 10개만
-            print("[DEBUG TOP] travel_id:", r["travel_id"], "tag_score:", r["tag_score"])
-            
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Number of recommendations: %d", len(recs))
+            if recs:
+                logger.debug("First rec tag_score: %s", recs[0].get('tag_score'))
+            #상위 결과 비교(최대 10개)
+            for idx, r in enumerate(recs[:10]):  # 상위 10개만
+                logger.debug("[TOP] travel_id: %s tag_score: %s", r["travel_id"], r["tag_score"])
+
 
         # 5) travel_id 議댁옱 �뺤씤
         recs = [r for r in recs if r.get("travel_id") is not None]
         if not recs:
             return jsonify({"error": "異붿쿇 寃곌낵�� �좏슚�� travel_id媛� �놁뒿�덈떎."}), 500
 
-        print("[DEBUG] keys in first rec:", recs[0].keys() if recs else "NO RECS")
+        logger.debug("keys in first rec: %s", recs[0].keys() if recs else "NO RECS")
 
         # 6) 여행지 메타 조인
-        travel_ids = [r["travel_id"] for r in recs]
-        travel_docs = list(mongo.db.travels.find(
-        {"travel_id": {"$in": travel_ids}},
-        {"_id": 0, "travel_id": 1, "name": 1,"image_urls": 1, "location": 1, "latitude": 1, "longitude": 1}
-            ))
-        tmap = {d["travel_id"]: d for d in travel_docs}
-
-        def build_map_url(name, lat, lng):
-            from urllib.parse import quote
-            enc = quote(name or "", safe="")
-            return f"https://map.kakao.com/link/map/{enc},{lat},{lng}"
-
-        # 7) 응답 R1 형태로 변환
-        enriched = []
-        for r in recs:
-            meta = tmap.get(r["travel_id"])
-            if not meta:
-                continue
-            
-            loc = meta.get("location", {})
-            lat = loc.get("lat")
-            lng = loc.get("lng")
-
-            raw = meta.get("image_urls")
-
-            # 1. 배열이면 그대로
-            if isinstance(raw, list):
-                image_urls = raw
-
-            # 2. 문자열이면 콤마 기준으로 나눔
-            elif isinstance(raw, str) and raw.strip():
-                image_urls = [url.strip() for url in raw.split(",")]
-
-            # 3. 단일 값 image_url만 있는 경우
-            elif meta.get("image_url"):
-                image_urls = [meta.get("image_url")]
-
-            # 4. 아무것도 없을 때
-            else:
-                image_urls = []
-
-            enriched.append({
-                "travel_id": r["travel_id"],
-                "name": meta.get("name"),
-                "image_urls": image_urls,
-                "location": {
-                    "lat": lat,
-                    "lng": lng
-                },
-                "map_url": build_map_url(meta.get("name"), lat, lng),
-                "scores": {
-                    "hybrid": r.get("hybrid_score"),
-                    "similarity": r.get("similarity_score"),
-                    "tag_match": r.get("tag_score")
-                }
-            })
-
-        return jsonify({
-            "status": "success",
-            "mode": mode,
-            "recommendations": enriched
-        }), 200
+        with stage_metrics.timer("travels_join"):
+            tmap = fetch_travel_meta([r["travel_id"] for r in recs])
+
+        # 7) 응답 R1 형태로 변환 ({"status", "mode", "recommendations"[, "debug"]})
+        with stage_metrics.timer("response_build"):
+            payload = (b'{"status":"success","mode":' + json_bytes(mode)
+                       + b',"recommendations":' + render_recommendations(recs, tmap))
+            if app.config.get("RECOMMEND_DEBUG"):
+                payload += b',"debug":' + json_bytes({"cache_hit": result.get("cache_hit", False)})
+            resp = json_response(payload + b"}")
+        stage_metrics.observe("total", time.perf_counter() - t_start)
+        return resp
 
     except Exception as e:
         print("異붿쿇 �ㅻ쪟:", e)
         return jsonify({"error": "異붿쿇 �ㅽ뙣", "detail": str(e)}), 500
+
+
+# 여러 입력(프리셋 테마 등)을 한 번에 추천 - SBERT encode / 유사도 행렬 계산을 한 번으로 묶음
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    try:
+        body = request.get_json(silent=True) or {}
+        inputs = body.get("inputs")
+        if not isinstance(inputs, list) or not inputs:
+            return jsonify({"error": "inputs must be a non-empty list"}), 400
+        if len(inputs) > app.config["RECOMMEND_BATCH_MAX"]:
+            return jsonify({"error": f"inputs는 최대 {app.config['RECOMMEND_BATCH_MAX']}개까지 가능합니다."}), 400
+        if not all(isinstance(x, dict) for x in inputs):
+            return jsonify({"error": "each input must be an object"}), 400
+
+        user_id = get_optional_user_id()
+        user_tags = get_survey_tags(user_id)
+        profile = get_profile_vector(user_id)
+
+        built = [build_model_input(x, user_tags) for x in inputs]
+        # tag_only 는 /recommend 와 같은 규칙 (입력별 categorized_tags + tag_only / 설정 기본값)
+        tag_only = [mode == "categorized_tags" and bool(x.get("tag_only", recommender.tag_only_categorized))
+                    for x, (_, mode) in zip(inputs, built)]
+        try:
+            results = inference_pool.run(recommender.recommend_places_batch, [d for d, _ in built], top_k=3,
+                                         profile=profile, tag_only=tag_only)
+        except (PoolOverloaded, InferenceTimeout) as e:
+            return overloaded_response(e)
+
+        # 모든 결과의 travel_id 를 모아 메타 조인은 한 번만
+        all_recs = [[r for r in res.get("recommendations", [])[:3] if r.get("travel_id") is not None]
+                    for res in results]
+        with stage_metrics.timer("travels_join"):
+            tmap = fetch_travel_meta(sorted({r["travel_id"] for recs in all_recs for r in recs}))
+
+        items = []
+        for (_, mode), res, recs in zip(built, results, all_recs):
+            item = b'{"mode":' + json_bytes(mode) + b',"recommendations":' + render_recommendations(recs, tmap)
+            if app.config.get("RECOMMEND_DEBUG"):
+                item += b',"debug":' + json_bytes({"cache_hit": res.get("cache_hit", False)})
+            items.append(item + b"}")
+
+        return json_response(b'{"status":"success","results":[' + b",".join(items) + b"]}")
+
+    except Exception as e:
+        print("[ERROR] batch recommend failed:", e)
+        return jsonify({"error": "batch recommend failed", "detail": str(e)}), 500
     
 
 # ==========================================================================
@@ -400,62 +634,18 @@ def submit_rating():
     except Exception:
         return jsonify({"error": "잘못된 사용자 인증 정보입니다."}), 400
 
-    travel_id = data.get('travel_id')  # 별점 남긴 여행지id
-    score = data.get('score')
-
-    # 심화: 피드백 기능
-    feedback_tags = data.get('feedback_tags', [])
-    if not isinstance(feedback_tags, list):
-        feedback_tags = [feedback_tags]
-
-    # 필수 데이터 체크
-    if not all([travel_id, score]):
-        return jsonify({"error": "travel_id와 score는 필수입니다."}), 400
-
-    # score 숫자/범위 체크
-    try:
-        score_f = float(score)
-    except:
-        return jsonify({"error": "별점은 숫자여야 합니다."}), 400
-
-    if not (0.0 <= score_f <= 5.0):
-        return jsonify({"error": "별점은 0~5 사이여야 합니다."}), 400
-
-    # travel_id 정수 변환
     try:
-        travel_id_int = int(travel_id)
-    except:
-        return jsonify({"error": "travel_id는 정수여야 합니다."}), 400
+        travel_id_int, score_f, feedback_tags = parse_rating_item(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    now = datetime.datetime.utcnow()
-
-    # 자동 북마크 처리
-    bookmark = mongo.db.bookmarks.find_one({"user_id": user_oid, "travel_id": travel_id_int})
-    if not bookmark:
-        mongo.db.bookmarks.insert_one({
-            "user_id": user_oid,
-            "travel_id": travel_id_int,
-            "tags": [],  # 초기 태그 없음
-            "created_at": now
-        })
-        print(f"[DEBUG] 자동 북마크 생성됨 travel_id={travel_id_int}")
-
-    # 기존 별점 업데이트 또는 생성
-    result = mongo.db.ratings.update_one(
-        {"user_id": user_oid, "travel_id": travel_id_int},
-        {
-            "$set": {
-                "score": score_f,
-                "feedback_tags": feedback_tags,
-                "updated_at": now
-            },
-            "$setOnInsert": {"created_at": now}
-        },
-        upsert=True
-    )
+    # 자동 북마크(없을 때만 생성) + 별점 upsert
+    result, new_bookmarks, _ = write_ratings(user_oid, [(travel_id_int, score_f, feedback_tags, None)])
+    profile_store.update(user_oid, ratings={travel_id_int: score_f},
+                         bookmarks={tid: True for tid in new_bookmarks})
 
     # 응답 메시지
-    if result.upserted_id:
+    if result.upserted_count:
         message = "별점이 새로 등록되었습니다."
         status = 201
     elif result.modified_count > 0:
@@ -468,6 +658,63 @@ def submit_rating():
     return jsonify({"message": message}), status
 
 
+# 별점 일괄 등록 (과거 별점 가져오기 등)
+# body: {"ratings": [{"travel_id", "score", "feedback_tags", "updated_at"(ISO 8601, 선택)}, ...]}
+# 잘못된 항목은 errors 로 돌려주고 나머지만 저장
+# updated_at 을 준 항목은 저장된 별점이 더 최근이면 덮어쓰지 않고 stale 로 돌려줌
+@app.route('/ratings/bulk', methods=['POST'])
+@jwt_required()
+def submit_ratings_bulk():
+    data = request.get_json() or {}
+
+    try:
+        user_oid = ObjectId(get_jwt_identity())
+    except Exception:
+        return jsonify({"error": "잘못된 사용자 인증 정보입니다."}), 400
+
+    items = data.get("ratings")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "ratings는 비어 있지 않은 리스트여야 합니다."}), 400
+    if len(items) > app.config["RATINGS_BULK_MAX"]:
+        return jsonify({"error": f"ratings는 최대 {app.config['RATINGS_BULK_MAX']}개까지 가능합니다."}), 400
+
+    parsed, errors = [], []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": i, "error": "각 항목은 객체여야 합니다."})
+            continue
+        try:
+            travel_id_int, score_f, feedback_tags = parse_rating_item(item)
+            updated_at = item.get("updated_at")
+            if updated_at is not None:
+                updated_at = datetime.datetime.fromisoformat(str(updated_at).replace("Z", "+00:00"))
+                if updated_at.tzinfo is not None:
+                    updated_at = updated_at.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        except ValueError as e:
+            errors.append({"index": i, "error": str(e)})
+            continue
+        parsed.append((travel_id_int, score_f, feedback_tags, updated_at))
+
+    if not parsed:
+        return jsonify({"error": "저장할 수 있는 별점이 없습니다.", "errors": errors}), 400
+
+    # 이미 더 최근 별점이 있는 항목(stale)은 덮어쓰지 않음
+    result, new_bookmarks, stale = write_ratings(user_oid, parsed)
+    written = {p[0]: p[1] for p in parsed}  # travel_id 중복이면 마지막 값 (write_ratings 와 동일)
+    for tid in stale:
+        written.pop(tid, None)
+    profile_store.update(user_oid, ratings=written,
+                         bookmarks={tid: True for tid in new_bookmarks})
+    return jsonify({
+        "received": len(items),
+        "written": len(written),
+        "created": result.upserted_count,
+        "modified": result.modified_count,
+        "stale": stale,
+        "errors": errors
+    }), 200
+
+
 
 # 마이페이지에서 태그 설문조사
 @app.route('/mypage/tags', methods=['POST'])
@@ -532,6 +779,7 @@ def toggle_bookmark(travel_id):
     existing = mongo.db.bookmarks.find_one({"user_id": user_oid, "travel_id": travel_id})
     if existing:
         mongo.db.bookmarks.delete_one({"_id": existing["_id"]})
+        profile_store.update(user_oid, bookmarks={travel_id: False})
         return jsonify({"status": "unbookmarked", "travel_id": travel_id}), 200
     else:
         mongo.db.bookmarks.insert_one({
@@ -540,6 +788,7 @@ def toggle_bookmark(travel_id):
             "tags": [],  # 초기엔 태그 없음
             "created_at": datetime.datetime.utcnow()
         })
+        profile_store.update(user_oid, bookmarks={travel_id: True})
         return jsonify({"status": "bookmarked", "travel_id": travel_id}), 200
 
 
@@ -553,29 +802,20 @@ def list_my_bookmarks():
     except:
         return jsonify({"error": "잘못된 사용자 ID"}), 400
 
-    # bookmarks 조인: travels에서 메타 가져오기
-    bs = list(mongo.db.bookmarks.find({"user_id": user_oid}))
-    
-    travel_ids = [b["travel_id"] for b in bs]
-    
-    travel_docs = list(mongo.db.travels.find(
-        {"travel_id": {"$in": travel_ids}},
-        {"_id": 0, "travel_id": 1, "name": 1,"image_urls":1, "location": 1}
-    ))
-    tmap = {d["travel_id"]: d for d in travel_docs}
+    # bookmarks 한 페이지 (created_at 최신순, ?limit=&cursor=) + 여행지 메타
+    try:
+        limit, cursor = page_args()
+        bs, next_cursor, metas = fetch_page(mongo.db.bookmarks, {"user_id": user_oid}, "created_at", cursor, limit)
+    except (ValueError, InvalidCursor) as e:
+        return jsonify({"error": str(e)}), 400
 
     items = []
-    for b in bs:
-        meta = tmap.get(b["travel_id"], {})
+    for b, meta in zip(bs, metas):
         loc = meta.get("location", {})
-        image_urls = meta.get("image_urls")
-        if not image_urls and meta.get("image_urls"):
-            urls = str(meta.get("image_urls")).split(",")
-            image_urls = urls[0].strip() if urls else None
         items.append({
             "travel_id": b["travel_id"],
             "name": meta.get("name"),
-            "image_urls": meta.get("image_urls"),
+            "image_urls": meta.get("image_urls_raw"),
             "location": {
                 "lat": loc.get("lat"),
                 "lng": loc.get("lng")
@@ -584,7 +824,7 @@ def list_my_bookmarks():
             "bookmarked_at": b.get("created_at").isoformat() if b.get("created_at") else None
         })
         
-    return jsonify({"bookmarks": items, "count": len(items)}), 200
+    return jsonify({"bookmarks": items, "count": len(items), "next_cursor": next_cursor}), 200
 
 
 # 북마크한 여행지에 사용자가 태그 추가
@@ -634,10 +874,12 @@ def health():
 
     db_ok = False # 湲곕낯
     db_error = None # 湲곕낯
+    unique_indexes = None
     
     try:
         mongo.cx.admin.command("ping")
         db_ok = True
+        unique_indexes = users_unique_ready()  # False 면 회원가입이 조회 방식 중복 체크로 동작 중
     except Exception as e:
         db_error = str(e) # 오류메시지 저장
         
@@ -653,13 +895,56 @@ def health():
         "status": "ok" if overall_ok else "degraded",
         "db_connected": db_ok,
         "db_error": db_error if not db_ok else None,
+        "unique_indexes": unique_indexes,
         "places_loaded": places_loaded,
-        "embedding_ready": embedding_ready
+        "embedding_ready": embedding_ready,
+        "embedder_loaded": recommender.embedder_loaded,
+        "query_cache": recommender.query_cache.stats(),
+        "result_cache": recommender.result_cache.stats(),
+        "retrieval": dict(recommender.retrieval_stats,
+                          index=recommender.retrieval_conf.get("index", "exact"),
+                          prefilter=recommender.prefilter),
+        "inference_pool": inference_pool.stats(),
+        "password_pool": password_hasher.stats(),
+        "user_profiles": profile_store.stats(),
+        "micro_batcher": recommender.batcher.stats() if recommender.batcher is not None else None,
+        "stages": stage_metrics.snapshot(),
+        "travel_cache": travel_cache.stats(),
     }), status_code
 
 
 
 
+# Prometheus 스크랩용 (워커 프로세스 단위 값)
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # gauge: 현재 상태 값, counter: 프로세스 시작 후 누적값 (_total)
+    gauges, counters = [], []
+    for cache_name, cache in (("query_embedding", recommender.query_cache), ("results", recommender.result_cache)):
+        st = cache.stats()
+        gauges.append(("recommend_cache_size", "Recommender cache size.", {"cache": cache_name}, st["size"]))
+        for key in ("hits", "misses", "evictions"):
+            counters.append((f"recommend_cache_{key}_total", f"Recommender cache {key}.", {"cache": cache_name}, st[key]))
+    pool = inference_pool.stats()
+    gauges.append(("recommend_inference_pool_in_flight", "Inference pool in_flight.", {}, pool["in_flight"]))
+    for key in ("completed", "rejected", "timeouts"):
+        counters.append((f"recommend_inference_pool_{key}_total", f"Inference pool {key}.", {}, pool[key]))
+    auth = password_hasher.stats()
+    gauges.append(("auth_password_pool_in_flight", "Password hashing pool in_flight.", {}, auth["in_flight"]))
+    for key in ("completed", "rejected", "throttled", "timeouts", "broken", "rehashed"):
+        counters.append((f"auth_password_pool_{key}_total", f"Password hashing pool {key}.", {}, auth[key]))
+    if recommender.batcher is not None:
+        bst = recommender.batcher.stats()
+        counters.append(("recommend_batcher_batches_total", "Micro-batches executed.", {}, bst["batches"]))
+        counters.append(("recommend_batcher_items_total", "Queries processed by the micro-batcher.", {}, bst["items"]))
+    for key in ("candidate_queries", "fallbacks"):
+        counters.append((f"recommend_retrieval_{key}_total", f"Candidate retrieval {key}.", {},
+                         recommender.retrieval_stats[key]))
+
+    body = stage_metrics.render_prometheus(gauges=gauges, counters=counters)
+    return Response(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ------------------------------
 # 서버 링크 검색 시 나오는 문장
 @app.route('/')
@@ -667,8 +952,11 @@ def home():
     return '서버 잘 작동 중입니다.'
 
 
+# 운영은 gunicorn -c gunicorn.conf.py wsgi:app (아래는 로컬 개발용 서버)
 if __name__ == "__main__":
     # 환경변수 설정
     port = int(os.environ.get("PORT", 5000))
+    # 첫 요청이 모델 로딩을 기다리지 않도록 미리 워밍업
+    print(f"[BOOT] SBERT warm-up: {recommender.warm_up():.0f} ms")
     # 모든 IP주소에서 접근 가능
-    app.run(debug=False, host="0.0.0.0", port=port)
+    app.run(debug=False, host="0.0.0.0", port=port, threaded=True)
@@ -3,3 +3,26 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', '3Ud9hD29Xd2eB3nF03qYn76V')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', '23h3uinfF38g02873b5Og')
+    # True 면 /recommend 응답에 디버그 정보(cache_hit 등) 포함
+    RECOMMEND_DEBUG = os.environ.get('RECOMMEND_DEBUG', '0') == '1'
+    # /recommend/batch 한 번에 받을 수 있는 최대 입력 수
+    RECOMMEND_BATCH_MAX = int(os.environ.get('RECOMMEND_BATCH_MAX', 20))
+    # travels 메타 캐시: 버전 확인 주기(초), 변경 스트림 사용 여부 (replica set 필요)
+    TRAVEL_CACHE_CHECK_SECONDS = int(os.environ.get('TRAVEL_CACHE_CHECK_SECONDS', 60))
+    TRAVEL_CACHE_CHANGE_STREAM = os.environ.get('TRAVEL_CACHE_CHANGE_STREAM', '0') == '1'
+    # /ratings/bulk 한 번에 받을 수 있는 최대 별점 수
+    RATINGS_BULK_MAX = int(os.environ.get('RATINGS_BULK_MAX', 1000))
+    # 비밀번호 해시: werkzeug 방식 문자열 (다른 방식으로 저장된 해시는 로그인 시 교체)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # 해시 계산 프로세스 수 / 대기 한도(넘으면 503) / 요청별 제한 시간(초, 넘으면 504)
+    PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', 2))
+    PASSWORD_POOL_QUEUE = int(os.environ.get('PASSWORD_POOL_QUEUE', 32))
+    PASSWORD_POOL_TIMEOUT = float(os.environ.get('PASSWORD_POOL_TIMEOUT', 10))
+    # 앞단 프록시(Railway 등) 수: X-Forwarded-For 에서 이만큼 믿고 실제 클라이언트 IP 를 얻음 (0 이면 사용 안 함)
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+    # 같은 IP / 아이디의 동시 로그인 처리 수 (넘으면 429, 0 이면 제한 없음)
+    LOGIN_CONCURRENCY_PER_IP = int(os.environ.get('LOGIN_CONCURRENCY_PER_IP', 4))
+    LOGIN_CONCURRENCY_PER_USER = int(os.environ.get('LOGIN_CONCURRENCY_PER_USER', 2))
+    # /mypage, /mypage/bookmarks 한 페이지 기본 크기 / 최대 크기 (?limit=)
+    MYPAGE_PAGE_SIZE = int(os.environ.get('MYPAGE_PAGE_SIZE', 50))
+    MYPAGE_PAGE_MAX = int(os.environ.get('MYPAGE_PAGE_MAX', 200))
@@ -0,0 +1,55 @@
+from extensions import mongo
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+
+# 컬렉션 인덱스 (부팅 시 ensure_indexes() 로 없으면 생성)
+#
+#   ratings   (user_id, travel_id) unique  - 별점 upsert 조회 + 유저당 여행지 1개 보장
+#   bookmarks (user_id, travel_id) unique  - 자동 북마크 upsert 조회 + 중복 북마크 방지
+#   users     username unique, email unique - 회원가입 중복 체크 (insert 한 번, DuplicateKeyError → 409)
+#   ratings   (user_id, updated_at -1, _id -1) - /mypage 키셋 페이지네이션 (pagination.py)
+#   bookmarks (user_id, created_at -1, _id -1) - /mypage/bookmarks 키셋 페이지네이션
+#   travels   travel_id                      - 위 두 목록의 $lookup (travel_cache 가 비어 있을 때)
+#
+# create_index 는 같은 인덱스가 이미 있으면 아무것도 하지 않는다.
+# unique 인덱스는 기존 데이터에 중복이 있으면 만들어지지 않으므로 경고만 남기고 계속 진행한다.
+# users 의 unique 인덱스가 없는 동안은 회원가입이 insert 전에 find_one 으로 중복을 확인하고
+# (users_unique_ready), /health 의 unique_indexes 와 import-users 가 이 상태를 알려준다.
+
+INDEXES = [
+    ("ratings", [("user_id", ASCENDING), ("travel_id", ASCENDING)],
+     {"name": "user_travel_unique", "unique": True}),
+    ("bookmarks", [("user_id", ASCENDING), ("travel_id", ASCENDING)],
+     {"name": "user_travel_unique", "unique": True}),
+    ("users", [("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+    ("users", [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ("ratings", [("user_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "user_updated_at"}),
+    ("bookmarks", [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "user_created_at"}),
+    ("travels", [("travel_id", ASCENDING)], {"name": "travel_id"}),
+]
+
+USERS_UNIQUE_INDEXES = ("username_unique", "email_unique")
+_users_unique_ready = False
+
+
+def ensure_indexes():
+    """INDEXES 를 생성. 생성(또는 이미 존재)된 인덱스 이름 목록 반환"""
+    created = []
+    for collection, keys, options in INDEXES:
+        try:
+            created.append(f"{collection}.{mongo.db[collection].create_index(keys, **options)}")
+        except OperationFailure as e:
+            print(f"[WARN] index {collection}.{options.get('name')} not created:", e)
+    return created
+
+
+def users_unique_ready():
+    """users 의 username / email unique 인덱스가 모두 있는지 (한 번 확인되면 이후에는 조회하지 않음)"""
+    global _users_unique_ready
+    if not _users_unique_ready:
+        names = mongo.db.users.index_information()
+        _users_unique_ready = all(name in names for name in USERS_UNIQUE_INDEXES)
+    return _users_unique_ready
@@ -0,0 +1,23 @@
+import json
+
+# orjson 이 설치되어 있으면 사용 (pip install orjson), 없으면 표준 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """obj → JSON bytes (UTF-8, 공백 없음)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def open_object(obj):
+    """dict 직렬화 결과에서 닫는 괄호만 뺀 조각 - 뒤에 b',"key":...}' 를 이어 붙여 완성한다"""
+    return dumps(obj)[:-1]
+
+
+def backend():
+    return "orjson" if orjson is not None else "json"
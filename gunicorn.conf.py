@@ -0,0 +1,42 @@
+# gunicorn 설정
+#   실행: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# preload_app = True 이면 master 프로세스가 app.py 를 한 번 import 한 뒤 워커를 fork 한다.
+# → SentenceTransformer 모델, 추천기 데이터가 fork 전에 한 번만 로딩되고
+#   워커들은 copy-on-write 로 같은 메모리를 공유한다.
+# RECOMMENDER_LOAD_MODE=mmap 과 함께 쓰면 임베딩/태그 행렬은 mmap 된 .npy 라
+# 워커 수와 상관없이 OS 페이지 캐시 한 벌만 사용한다.
+import os
+
+# master 에서 app import 시 SBERT 가중치까지 로딩 (app.py 참고)
+os.environ.setdefault("RECOMMENDER_PRELOAD", "1")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+preload_app = True
+# gthread: 워커마다 요청 스레드 여러 개 → 추론(app.inference_pool)이 도는 동안에도
+# /login, /mypage, /health 같은 DB 위주 요청은 다른 스레드에서 계속 처리된다
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+
+
+def when_ready(server):
+    # preload 완료 후 (fork 직전) 호출
+    server.log.info("recommender preloaded in master (pid=%s), forking workers", os.getpid())
+
+
+def post_fork(server, worker):
+    server.log.info("worker spawned (pid=%s)", worker.pid)
+    # 비밀번호 해시 프로세스 풀은 다른 스레드(MongoDB 모니터, 요청, torch)가 생기기 전에 fork
+    from password_pool import password_hasher
+    password_hasher.start()
+    # PyMongo 클라이언트는 fork-safe 하지 않음: master 에서 부팅 때 쓴 클라이언트(ensure_indexes,
+    # travel_cache.refresh)의 소켓/모니터 스레드를 물려받지 않도록 워커마다 새로 만든다
+    from app import app
+    from extensions import mongo
+    mongo.init_app(app)
+    # 추론(encode) 워밍업은 fork 이후 워커에서 실행
+    # (fork 전에 torch/OpenMP 스레드 풀을 돌리면 자식 프로세스에서 멈출 수 있음)
+    from app import recommender
+    server.log.info("worker %s SBERT warm-up: %.0f ms", worker.pid, recommender.warm_up())
@@ -0,0 +1,76 @@
+from bson.objectid import ObjectId
+import base64
+import datetime
+
+
+# 키셋(커서) 페이지네이션
+#
+# (sort_field desc, _id desc) 순서로 정렬해 limit 개씩 잘라 보낸다.
+# 다음 페이지 커서는 마지막 문서의 (sort_field, _id) 라서 skip 없이 인덱스
+# (user_id, sort_field -1, _id -1) 에서 바로 이어 읽는다 → 기록이 많아도 응답 크기/비용은 페이지 크기만큼.
+# sort_field 가 없는 예전 문서(null)는 내림차순에서 날짜 문서들 뒤에 오므로,
+# 커서 값이 날짜면 null 문서도 다음 페이지 후보에 넣고, 커서 값이 null 이면 _id 로만 이어 읽는다.
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, oid):
+    raw = f"{value.isoformat() if value is not None else ''}|{oid}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        value, oid = raw.split("|", 1)
+        return (datetime.datetime.fromisoformat(value) if value else None), ObjectId(oid)
+    except Exception:
+        raise InvalidCursor("잘못된 cursor 입니다.")
+
+
+# travels 조인 ($lookup) 시 가져오는 필드 (travel_cache 가 비어 있을 때만 사용)
+LOOKUP_FIELDS = ("name", "image_urls", "location", "address", "short_description")
+
+
+def keyset_pipeline(match, sort_field, cursor=None, limit=50, lookup=False):
+    """
+    match 조건 + 커서 이후 문서를 limit + 1 개 (다음 페이지 존재 확인용) 가져오는 aggregation pipeline.
+    lookup=True 면 travels 메타를 "meta" 필드로 붙인다.
+    """
+    match = dict(match)
+    if cursor:
+        value, oid = decode_cursor(cursor)
+        if value is None:
+            match.update({sort_field: None, "_id": {"$lt": oid}})
+        else:
+            match["$or"] = [
+                {sort_field: {"$lt": value}},
+                {sort_field: value, "_id": {"$lt": oid}},
+                {sort_field: None},
+            ]
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {sort_field: -1, "_id": -1}},
+        {"$limit": limit + 1},
+    ]
+    if lookup:
+        pipeline += [
+            # localField/foreignField 형태라 travels.travel_id 인덱스를 탄다
+            {"$lookup": {"from": "travels", "localField": "travel_id", "foreignField": "travel_id", "as": "meta"}},
+            {"$addFields": {"meta": {"$let": {
+                "vars": {"m": {"$arrayElemAt": ["$meta", 0]}},
+                "in": {f: f"$$m.{f}" for f in LOOKUP_FIELDS},
+            }}}},
+        ]
+    return pipeline
+
+
+def split_page(docs, sort_field, limit):
+    """limit + 1 개 결과 → (페이지 문서, 다음 cursor 또는 None)"""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.get(sort_field), last["_id"])
@@ -0,0 +1,241 @@
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+
+from project_root1.inference_pool import PoolOverloaded, InferenceTimeout
+
+
+# 비밀번호 해시/검증 전용 프로세스 풀
+#
+# PBKDF2/scrypt 는 순수 CPU 작업이라 요청 스레드에서 돌리면 GIL 을 잡고 있어서
+# 로그인이 몰릴 때 같은 워커의 /recommend 가 같이 느려진다.
+# 해시는 별도 프로세스(workers 개)에서만 계산하고, 요청 스레드는 결과만 기다린다.
+#   - 실행 중 + 대기 중이 workers + max_queue 를 넘으면 바로 PoolOverloaded (→ 503)
+#   - timeout_seconds 안에 끝나지 않으면 InferenceTimeout (→ 504). 이미 시작된 해시는 끝날 때까지 자리를 차지
+#   - 워커 프로세스가 죽으면(BrokenProcessPool) 풀을 버리고 PoolOverloaded (→ 503), 다음 요청에서 새로 생성
+#   - limit(ip, username): IP / 아이디별 동시 처리 수 제한, 넘으면 TooManyAttempts (→ 429)
+# 해시 방식(method)은 werkzeug 형식 ("pbkdf2:sha256:600000", "scrypt:32768:8:1" 등).
+# 저장된 해시의 방식이 다르면 needs_rehash() 가 True → 로그인 성공 시 새 방식으로 교체
+
+
+class TooManyAttempts(RuntimeError):
+    """같은 IP / 아이디의 동시 로그인 처리 수 초과"""
+
+
+# 풀 프로세스에서 실행되는 함수 (pickle 되도록 모듈 최상위)
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored, password):
+    return check_password_hash(stored, password)
+
+
+def _noop():
+    return os.getpid()
+
+
+def hash_method_of(stored):
+    """저장된 해시 → 방식 부분 ("pbkdf2:sha256:600000$salt$hash" → "pbkdf2:sha256:600000")"""
+    return stored.split("$", 1)[0] if isinstance(stored, str) and "$" in stored else None
+
+
+class PasswordHasher:
+
+    def __init__(self, method="pbkdf2:sha256:600000", workers=2, max_queue=32, timeout_seconds=10.0,
+                 per_ip_limit=4, per_user_limit=2):
+        self.method = method
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout_seconds = float(timeout_seconds) if timeout_seconds else None
+        self.per_ip_limit = int(per_ip_limit)
+        self.per_user_limit = int(per_user_limit)
+        self._executor = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._active = {}  # "ip:..." / "user:..." → 처리 중인 요청 수
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.broken = 0
+        self.rehashed = 0
+        self.total_ms = 0.0
+
+    def configure(self, method=None, workers=None, max_queue=None, timeout_seconds=None,
+                  per_ip_limit=None, per_user_limit=None):
+        """app 설정값 반영 (풀이 시작되기 전에 호출)"""
+        if method:
+            self.method = method
+        if workers is not None:
+            self.workers = max(1, int(workers))
+        if max_queue is not None:
+            self.max_queue = max(0, int(max_queue))
+        if timeout_seconds is not None:
+            self.timeout_seconds = float(timeout_seconds) if timeout_seconds else None
+        if per_ip_limit is not None:
+            self.per_ip_limit = int(per_ip_limit)
+        if per_user_limit is not None:
+            self.per_user_limit = int(per_user_limit)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+
+    # ---------- 프로세스 풀 ----------
+    def start(self):
+        """
+        워커 프로세스 미리 생성. 요청/모니터 스레드가 생기기 전에 fork 되도록
+        gunicorn 은 post_fork 맨 앞, python app.py 는 app.run 전에 호출한다 (그 외에는 첫 사용 시 생성).
+        gunicorn preload 로 fork 된 부모의 풀은 쓰지 않고 프로세스마다 새로 만든다.
+        """
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._start_lock:
+            if self._executor is None or self._pid != os.getpid():
+                # fork: 자식은 해시 함수만 실행하므로 모델/코퍼스를 다시 import 하지 않는 fork 를 사용
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("fork"))
+                self._pid = os.getpid()
+                for f in [self._executor.submit(_noop) for _ in range(self.workers)]:
+                    f.result()
+        return self._executor
+
+    def _discard(self, executor):
+        """죽은 워커가 있는 풀을 버림 (다음 start() 에서 새로 생성)"""
+        if executor is None:
+            return
+        with self._start_lock:
+            if self._executor is executor:
+                self._executor = None
+                self._pid = None
+                with self._lock:
+                    self.broken += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future):
+        # 요청 스레드가 시간 초과로 먼저 돌아가도 자리는 해시가 실제로 끝날 때 반납
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolOverloaded(f"password pool full ({self.workers} running + {self.max_queue} queued)")
+        t0 = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        executor = None
+        try:
+            executor = self.start()
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release(None)
+            self._discard(executor or self._executor)
+            raise PoolOverloaded("password pool worker died, restarting")
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise InferenceTimeout(f"password hashing did not finish within {self.timeout_seconds}s")
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise PoolOverloaded("password pool worker died, restarting")
+        finally:
+            with self._lock:
+                self.total_ms += (time.perf_counter() - t0) * 1000
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def hash_many(self, passwords, chunksize=8):
+        """일괄 해시 (계정 가져오기용, 대기 한도 없이 풀 전체 사용)"""
+        passwords = list(passwords)
+        executor = self.start()
+        try:
+            return list(executor.map(_hash, passwords, itertools.repeat(self.method, len(passwords)),
+                                     chunksize=chunksize))
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def verify(self, stored, password):
+        if not stored:
+            return False
+        return self._run(_verify, stored, password)
+
+    def needs_rehash(self, stored):
+        return hash_method_of(stored) != self.method
+
+    def note_rehash(self):
+        with self._lock:
+            self.rehashed += 1
+
+    # ---------- IP / 아이디별 동시 처리 제한 ----------
+    @contextmanager
+    def limit(self, ip=None, username=None):
+        keys = []
+        if ip and self.per_ip_limit > 0:
+            keys.append((f"ip:{ip}", self.per_ip_limit))
+        if username and self.per_user_limit > 0:
+            keys.append((f"user:{username}", self.per_user_limit))
+
+        with self._lock:
+            if any(self._active.get(k, 0) >= cap for k, cap in keys):
+                self.throttled += 1
+                raise TooManyAttempts("too many concurrent login attempts")
+            for k, _ in keys:
+                self._active[k] = self._active.get(k, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                for k, _ in keys:
+                    n = self._active.get(k, 0) - 1
+                    if n > 0:
+                        self._active[k] = n
+                    else:
+                        self._active.pop(k, None)
+
+    def shutdown(self, wait=False):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            done = self.completed
+            return {
+                "method": self.method,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout_seconds,
+                "per_ip_limit": self.per_ip_limit,
+                "per_user_limit": self.per_user_limit,
+                "started": self._executor is not None and self._pid == os.getpid(),
+                "in_flight": self.in_flight,
+                "completed": done,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "timeouts": self.timeouts,
+                "broken": self.broken,
+                "rehashed": self.rehashed,
+                "avg_ms": round(self.total_ms / done, 3) if done else 0.0,
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,216 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from project_root1.embedding_store import EmbeddingStore
+from project_root1.tag_index import TAG_CATEGORIES, TagIndex
+
+
+# 서빙 번들 (= mmap 아티팩트 디렉터리)
+#
+#   <bundle_dir>/
+#     manifest.json        포맷/번들 버전, 행 수, 차원, 태그 어휘, 파일별 sha256, 원본 파일 시그니처
+#     embeddings.npy       L2 정규화된 float32 (N, d)
+#     season_codes.npy     int32 (N,)
+#     tags_<cat>.npy       uint8 multi-hot (N, V_cat)   cat = nature / vibe / target
+#     travel_ids.npy       int64 (N,)              행 → travel_id
+#     travel_index.npy     int64 (2, N)            [정렬된 travel_id, 해당 행 번호] (travel_id → 행 조회)
+#     metadata.json        추천 응답에 필요한 컬럼만 담은 compact 메타 테이블
+#
+# .npy 를 mmap_mode='r' 로 열면 gunicorn 워커 여러 개가 같은 파일을 열어도
+# OS 페이지 캐시를 공유하므로 워커 수만큼 메모리가 늘지 않는다.
+# 번들만 있으면 CSV 파싱 없이 추천기를 띄울 수 있다 (load_recommender_bundle).
+
+BUNDLE_FORMAT = "gangwon-serving-bundle"
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.json"
+
+# 추천 결과(_build_result)와 태그 인덱스 재생성에 필요한 컬럼
+METADATA_COLUMNS = ["travel_id", "name", "season", "nature", "vibe", "target", "short_description"]
+
+
+def source_signature(paths: List[str]) -> Dict[str, Dict]:
+    """원본 파일 (크기, 수정시각) - 번들이 오래됐는지 판단하는 용도"""
+    sig = {}
+    for p in paths:
+        st = os.stat(p)
+        sig[os.path.basename(p)] = {"size": st.st_size, "mtime": int(st.st_mtime)}
+    return sig
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def export_artifacts(df: pd.DataFrame, embeddings: np.ndarray, out_dir: str,
+                     sources: Optional[Dict] = None, sbert_model: Optional[str] = None) -> str:
+    """df + 임베딩으로 서빙 번들 생성 (임시 디렉터리에 쓴 뒤 교체)"""
+    df = df.reset_index(drop=True)
+    store = EmbeddingStore(embeddings)
+    tag_index = TagIndex.from_df(df)
+    if len(store) != len(df):
+        raise ValueError(f"embeddings rows ({len(store)}) != df rows ({len(df)})")
+
+    travel_ids = df["travel_id"].to_numpy(dtype=np.int64)
+    if len(np.unique(travel_ids)) != len(travel_ids):
+        raise ValueError("travel_id must be unique")
+
+    out_dir = os.path.abspath(out_dir)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "embeddings.npy"), store.vectors)
+    np.save(os.path.join(tmp_dir, "season_codes.npy"), tag_index.season_codes.astype(np.int32))
+    for cat in TAG_CATEGORIES:
+        np.save(os.path.join(tmp_dir, f"tags_{cat}.npy"), tag_index.matrices[cat])
+    np.save(os.path.join(tmp_dir, "travel_ids.npy"), travel_ids)
+    order = np.argsort(travel_ids, kind="stable")
+    np.save(os.path.join(tmp_dir, "travel_index.npy"), np.stack([travel_ids[order], order]).astype(np.int64))
+
+    cols = [c for c in METADATA_COLUMNS if c in df.columns]
+    meta_df = df[cols].astype(object).where(df[cols].notna(), None)
+    with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump({c: meta_df[c].tolist() for c in cols}, f, ensure_ascii=False, default=int)
+
+    def vocab_list(vocab: Dict[str, int]) -> List[str]:
+        return [t for t, _ in sorted(vocab.items(), key=lambda kv: kv[1])]
+
+    files = {
+        name: {"sha256": file_sha256(os.path.join(tmp_dir, name)),
+               "bytes": os.path.getsize(os.path.join(tmp_dir, name))}
+        for name in sorted(os.listdir(tmp_dir))
+    }
+    digest = hashlib.sha256("".join(f["sha256"] for f in files.values()).encode()).hexdigest()
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "bundle_version": digest[:12],
+        "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "rows": len(df),
+        "dim": store.dim,
+        "sbert_model": sbert_model,
+        "season_vocab": vocab_list(tag_index.season_vocab),
+        "vocabs": {cat: vocab_list(tag_index.vocabs[cat]) for cat in TAG_CATEGORIES},
+        "files": files,
+        "sources": sources or {},
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 기존 디렉터리 교체
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+def read_manifest(bundle_dir: str) -> Optional[Dict]:
+    path = os.path.join(bundle_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT or manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def artifacts_up_to_date(bundle_dir: str, sources: Dict) -> bool:
+    manifest = read_manifest(bundle_dir)
+    return manifest is not None and manifest.get("sources") == sources
+
+
+def verify_bundle(bundle_dir: str, manifest: Dict):
+    """manifest 의 sha256 과 실제 파일 비교. 다르면 ValueError"""
+    for name, info in manifest["files"].items():
+        path = os.path.join(bundle_dir, name)
+        if not os.path.exists(path) or file_sha256(path) != info["sha256"]:
+            raise ValueError(f"bundle checksum mismatch: {path}")
+
+
+class ServingBundle:
+    """로딩된 서빙 번들 (임베딩 스토어 + 태그 인덱스 + travel_id 인덱스 + 메타 테이블)"""
+
+    def __init__(self, bundle_dir: str, mmap_mode: Optional[str] = "r", verify: bool = False):
+        manifest = read_manifest(bundle_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"serving bundle manifest not found: {os.path.join(bundle_dir, MANIFEST_FILE)}")
+        if verify:
+            verify_bundle(bundle_dir, manifest)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(bundle_dir, name), mmap_mode=mmap_mode)
+
+        self.bundle_dir = bundle_dir
+        self.manifest = manifest
+        self.store = EmbeddingStore(load("embeddings.npy"), normalized=True)
+        vocabs = {cat: {t: i for i, t in enumerate(manifest["vocabs"][cat])} for cat in TAG_CATEGORIES}
+        season_vocab = {t: i for i, t in enumerate(manifest["season_vocab"])}
+        matrices = {cat: load(f"tags_{cat}.npy") for cat in TAG_CATEGORIES}
+        self.tag_index = TagIndex(load("season_codes.npy"), season_vocab, vocabs, matrices)
+        self.travel_ids = load("travel_ids.npy")
+        self._sorted_ids, self._sorted_rows = load("travel_index.npy")
+
+        rows = manifest["rows"]
+        if len(self.store) != rows or len(self.tag_index) != rows or len(self.travel_ids) != rows:
+            raise ValueError(f"bundle row count mismatch in {bundle_dir}")
+
+    @property
+    def version(self) -> str:
+        return self.manifest["bundle_version"]
+
+    def row_of(self, travel_id: int) -> Optional[int]:
+        """travel_id → 행 번호 (없으면 None)"""
+        i = int(np.searchsorted(self._sorted_ids, travel_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == travel_id:
+            return int(self._sorted_rows[i])
+        return None
+
+    def load_metadata(self) -> pd.DataFrame:
+        with open(os.path.join(self.bundle_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+            return pd.DataFrame(json.load(f))
+
+
+def load_recommender_mmap(recommender, csv_path: str, embedding_path: str, bundle_dir: str):
+    """
+    공유 번들 디렉터리에서 임베딩/태그 인덱스를 mmap 으로 로딩 (메타는 CSV 사용).
+    번들이 없거나 원본(CSV/npy)보다 오래됐으면 한 번 만들어 둔다.
+    (gunicorn preload_app 사용 시 master 에서 한 번만 실행됨)
+    """
+    df = pd.read_csv(csv_path).reset_index(drop=True)
+    sources = source_signature([csv_path, embedding_path])
+    if not artifacts_up_to_date(bundle_dir, sources):
+        print("[BOOT] building serving bundle:", bundle_dir)
+        export_artifacts(df, np.load(embedding_path), bundle_dir, sources=sources,
+                         sbert_model=recommender.model_name)
+
+    bundle = ServingBundle(bundle_dir, mmap_mode="r")
+    if not np.array_equal(np.asarray(bundle.travel_ids), df["travel_id"].to_numpy()):
+        raise ValueError("bundle travel_ids do not match the CSV row order")
+    recommender.set_data(df, bundle.store, bundle.tag_index)
+    recommender.bundle = bundle
+
+
+def load_recommender_bundle(recommender, bundle_dir: str, verify: bool = True):
+    """미리 빌드한 번들만으로 로딩 (CSV 파싱 없음)"""
+    bundle = ServingBundle(bundle_dir, mmap_mode="r", verify=verify)
+    model = bundle.manifest.get("sbert_model")
+    if model and model != recommender.model_name:
+        print(f"[WARN] bundle built for {model}, recommender uses {recommender.model_name}")
+    recommender.set_data(bundle.load_metadata(), bundle.store, bundle.tag_index)
+    recommender.bundle = bundle
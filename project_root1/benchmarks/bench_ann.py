@@ -0,0 +1,124 @@
+"""
+근사 최근접 이웃 인덱스 벤치마크 (retrieval.index = exact / ivf / hnsw)
+
+  python -m project_root1.benchmarks.bench_ann [--sizes 1000 10000 100000] [--queries 200] [--k 10]
+
+강원 카탈로그를 임베딩 jitter 로 늘린 합성 카탈로그(synthetic.py)에서
+- 인덱스 빌드 시간
+- 유사도 recall@k (인덱스 search vs 전체 행렬곱)
+- 추천 결과 recall@k (후보 풀 하이브리드 재정렬 vs exact 추천) 와 쿼리당 지연시간
+을 측정한다. 쿼리 벡터는 SBERT 대신 jitter 벡터를 쿼리 임베딩 캐시에 넣어 사용한다.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from project_root1.benchmarks.synthetic import jitter_queries, synthetic_catalog
+from project_root1.recommend_module import GangwonPlaceRecommender
+from project_root1.topk import select_top_k
+from project_root1.vector_index import build_vector_index
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config", "config.yaml")
+
+
+def make_parsed_queries(df: pd.DataFrame, n: int, seed: int = 7) -> List[Dict]:
+    """카탈로그 행의 태그로 categorized 입력을 만든다 (쿼리 문장이 서로 다르도록 번호를 붙임)"""
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(0, len(df), size=n)]
+    parsed = []
+    for i, (_, row) in enumerate(rows.iterrows()):
+        def tags(col):
+            return [t.strip() for t in str(row[col]).split(",") if t.strip()][:2] if isinstance(row[col], str) else []
+        parsed.append({"free_text": f"q{i} {row['name']}", "season": None,
+                       "nature": tags("nature"), "vibe": tags("vibe"), "target": tags("target")})
+    return parsed
+
+
+def recall(found: List[np.ndarray], truth: List[np.ndarray]) -> float:
+    return float(np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(found, truth)]))
+
+
+def bench_size(size: int, backends: List[str], n_queries: int, k: int, df: pd.DataFrame,
+               embeddings: np.ndarray) -> Dict:
+    cat_df, cat_emb = synthetic_catalog(df, embeddings, size)
+    rec = GangwonPlaceRecommender(CONFIG_PATH)
+    rec.query_cache.max_size = n_queries * 2
+    rec.result_cache.max_size = 0
+    rec.df = cat_df
+    rec.place_embeddings = cat_emb
+
+    parsed = make_parsed_queries(cat_df, n_queries)
+    qvs = jitter_queries(rec.place_embeddings, n_queries)
+    for p, qv in zip(parsed, qvs):
+        rec.query_cache.set(rec.query_cache.normalize_query(rec._build_query_text(p)), qv)
+
+    store = rec.embedding_store
+    sim_truth = [select_top_k(store.scores(q), k) for q in qvs]
+    report = {"rows": size, "queries": n_queries, "k": k, "backends": {}}
+    exact_results = None
+
+    for backend in backends:
+        conf = dict(rec.retrieval_conf, index=backend)
+        t0 = time.perf_counter()
+        try:
+            index = build_vector_index(store, conf)
+        except ImportError as e:
+            print("[WARN]", e)
+            continue
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        rec.retrieval_conf = conf
+        rec._vector_index = index
+
+        found = [index.search(q, k)[0] for q in qvs]
+        times, results = [], []
+        for p in parsed:
+            t0 = time.perf_counter()
+            out = rec._recommend_parsed(p, top_k=k)
+            times.append((time.perf_counter() - t0) * 1000)
+            results.append(np.array([r["travel_id"] for r in out["recommendations"]]))
+        if backend == "exact":
+            exact_results = results
+
+        entry = {
+            "build_ms": build_ms,
+            f"sim_recall@{k}": recall(found, sim_truth),
+            "recommend_ms_p50": float(np.percentile(times, 50)),
+            "recommend_ms_p95": float(np.percentile(times, 95)),
+        }
+        if exact_results is not None:
+            entry[f"recommend_recall@{k}"] = recall(results, exact_results)
+        report["backends"][backend] = entry
+        print(f"[INFO] rows={size} {backend}: {entry}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN vector index recall/latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["exact", "ivf", "hnsw"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", default=os.path.join(PROJECT_ROOT, "outputs", "ann_benchmark.json"))
+    args = parser.parse_args()
+
+    if "exact" in args.backends:
+        args.backends = ["exact"] + [b for b in args.backends if b != "exact"]  # recall 기준을 먼저
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "data", "processed", "gangwon_matching_results_sorted.csv"))
+    embeddings = np.load(os.path.join(PROJECT_ROOT, "place_embeddings_v2.npy"))
+
+    reports = [bench_size(size, args.backends, args.queries, args.k, df, embeddings) for size in args.sizes]
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    print("saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+로그인(비밀번호 검증) 동시 부하 벤치마크
+
+  python -m project_root1.benchmarks.bench_login [--concurrency 1 4 16 32] [--logins 200]
+         [--method pbkdf2:sha256:600000] [--workers 2] [--out outputs/benchmarks/login.json]
+
+- inline : 요청 스레드에서 바로 check_password_hash (기존 user_utils 방식)
+- pool   : password_pool.PasswordHasher 프로세스 풀
+동시 클라이언트 스레드 수별로 로그인 처리량(logins/s), 지연시간 p50/p95 를 재고,
+같은 프로세스에서 /recommend 를 흉내 낸 작은 작업(probe)을 계속 돌려 그 지연시간도 같이 기록한다
+(로그인 해시가 GIL 을 잡고 있으면 probe 지연시간이 늘어난다).
+DB 는 쓰지 않는다 (해시 계산 비용만 측정).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from password_pool import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def probe_work(corpus: np.ndarray, query: np.ndarray) -> None:
+    """/recommend 의 점수 계산 + 파이썬 후처리 비슷한 작은 작업"""
+    scores = corpus @ query
+    top = np.argpartition(-scores, 10)[:10]
+    sorted((float(scores[i]), int(i)) for i in top)
+    sum(len(str(i)) for i in range(2000))
+
+
+class Probe:
+    """부하 동안 probe_work 지연시간을 계속 기록하는 스레드"""
+
+    def __init__(self, interval_ms: float = 5.0):
+        rng = np.random.default_rng(0)
+        self.corpus = rng.standard_normal((5000, 256)).astype(np.float32)
+        self.query = rng.standard_normal(256).astype(np.float32)
+        self.interval = interval_ms / 1000.0
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            probe_work(self.corpus, self.query)
+            self.samples.append((time.perf_counter() - t0) * 1000)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0}
+    p = np.percentile(values, [50, 95])
+    return {"p50_ms": round(float(p[0]), 3), "p95_ms": round(float(p[1]), 3)}
+
+
+def run_level(verify: Callable[[str, str], bool], stored: str, concurrency: int, logins: int) -> Dict:
+    times: List[float] = []
+
+    def one(_):
+        t0 = time.perf_counter()
+        ok = verify(stored, PASSWORD)
+        times.append((time.perf_counter() - t0) * 1000)
+        return ok
+
+    with Probe() as probe, ThreadPoolExecutor(max_workers=concurrency) as ex:
+        t_all = time.perf_counter()
+        assert all(ex.map(one, range(logins)))
+        elapsed = time.perf_counter() - t_all
+
+    return {
+        "concurrency": concurrency,
+        "logins": logins,
+        "logins_per_s": round(logins / elapsed, 2),
+        "login": percentiles(times),
+        "probe": percentiles(probe.samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="login hashing throughput benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--method", default="pbkdf2:sha256:600000")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["inline", "pool"], choices=["inline", "pool"])
+    parser.add_argument("--out", default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    stored = generate_password_hash(PASSWORD, method=args.method)
+    hasher = PasswordHasher(method=args.method, workers=args.workers, max_queue=max(args.concurrency),
+                            timeout_seconds=None)
+    hasher.start()
+    verifiers = {"inline": check_password_hash, "pool": hasher.verify}
+
+    with Probe() as idle:
+        time.sleep(1.0)
+    print(f"[INFO] idle probe: {percentiles(idle.samples)}")
+
+    results = {"idle_probe": percentiles(idle.samples), "modes": {}}
+    for mode in args.modes:
+        results["modes"][mode] = []
+        for c in args.concurrency:
+            r = run_level(verifiers[mode], stored, c, args.logins)
+            results["modes"][mode].append(r)
+            print(f"[INFO] {mode:<6} c={c:<3} {r['logins_per_s']:>8.1f} logins/s  "
+                  f"login p50 {r['login']['p50_ms']:.1f} / p95 {r['login']['p95_ms']:.1f} ms  "
+                  f"probe p50 {r['probe']['p50_ms']:.2f} / p95 {r['probe']['p95_ms']:.2f} ms")
+    hasher.shutdown(wait=True)
+
+    results["meta"] = {"method": args.method, "workers": args.workers, "cpu_count": os.cpu_count()}
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print("saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+PCA 축소 차원 서빙 벤치마크 (768 vs 256 vs 128 vs 64)
+
+  python -m project_root1.benchmarks.bench_pca [--queries 200] [--encode]
+
+- 768 : 원본 (기준)
+- 256 : models/pca_reducer_256.joblib
+- 128 : 서빙 코퍼스에서 바로 fit (model.reduced_dim)
+- 64  : models/enhanced/pca_model.joblib
+
+data/embeddings/place_embeddings_pca*.npy 는 행 수가 서빙 CSV(999행)와 달라서 쓰지 않고,
+place_embeddings_v2.npy 를 각 PCA 로 투영해 비교한다.
+쿼리는 기본적으로 코퍼스 벡터에 노이즈를 섞어 만들고, --encode 면 SBERT 로 실제 문장을 인코딩한다.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from project_root1.embedding_store import EmbeddingStore, PCAProjection
+from project_root1.topk import select_top_k
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_queries(corpus: np.ndarray, n: int, noise: float = 0.5, seed: int = 42) -> np.ndarray:
+    """코퍼스 벡터 + 가우시안 노이즈 (정규화된 공간 기준)"""
+    rng = np.random.default_rng(seed)
+    base = EmbeddingStore.normalize(corpus[rng.integers(0, len(corpus), size=n)])
+    jitter = rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(base.shape[1])
+    return base + noise * jitter
+
+
+def encode_queries(n: int) -> np.ndarray:
+    """CSV 의 태그/소개 문장으로 실제 SBERT 쿼리 생성"""
+    import pandas as pd
+    import yaml
+
+    from project_root1.encoders import load_encoder
+
+    with open(os.path.join(PROJECT_ROOT, "config", "config.yaml"), "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "data", "processed", "gangwon_matching_results_sorted.csv"))
+    texts = (df["nature"].fillna("") + " " + df["vibe"].fillna("") + " " + df["target"].fillna("")).str.strip()
+    texts = texts.sample(n=min(n, len(texts)), random_state=42).tolist()
+    encoder = load_encoder(config, config.get("model", {}).get("sbert_model"), PROJECT_ROOT)
+    return np.asarray(encoder.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+
+def top_rows(store: EmbeddingStore, queries: np.ndarray, k: int):
+    return [select_top_k(store.scores(q), k) for q in queries]
+
+
+def bench(corpus: np.ndarray, queries: np.ndarray, projection: Optional[PCAProjection],
+          baseline: Optional[Dict] = None, repeat: int = 3) -> Dict:
+    if projection is not None:
+        store = EmbeddingStore(projection.transform(EmbeddingStore.normalize(corpus)))
+        qs = projection.transform(EmbeddingStore.normalize(queries))
+    else:
+        store = EmbeddingStore(corpus)
+        qs = queries
+
+    # 쿼리 투영 + 유사도 + top-k 까지 쿼리 1건 단위로 측정 (서빙 경로와 동일)
+    times = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            v = projection.transform(EmbeddingStore.normalize(q)) if projection is not None else q
+            select_top_k(store.scores(v), 10)
+            times.append((time.perf_counter() - t0) * 1000)
+
+    report = {
+        "dim": store.dim,
+        "corpus_bytes": int(store.vectors.nbytes),
+        "ms_mean": float(np.mean(times)),
+        "ms_p95": float(np.percentile(times, 95)),
+    }
+    result = {k: top_rows(store, qs, k) for k in (3, 10)}
+    if baseline is not None:
+        for k in (3, 10):
+            overlap = [len(set(a[:k]) & set(b[:k])) / k for a, b in zip(result[k], baseline[k])]
+            report[f"top{k}_overlap"] = float(np.mean(overlap))
+        report["top1_agree"] = float(np.mean([a[0] == b[0] for a, b in zip(result[3], baseline[3])]))
+    return report, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCA reduced-dimension serving benchmark")
+    parser.add_argument("--embeddings", default=os.path.join(PROJECT_ROOT, "place_embeddings_v2.npy"))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--encode", action="store_true", help="SBERT 로 실제 쿼리 문장 인코딩")
+    parser.add_argument("--out", default=os.path.join(PROJECT_ROOT, "outputs", "pca_benchmark.json"))
+    args = parser.parse_args()
+
+    corpus = np.load(args.embeddings).astype(np.float32)
+    queries = encode_queries(args.queries) if args.encode else make_queries(corpus, args.queries)
+    normalized = EmbeddingStore.normalize(corpus)
+
+    candidates = {
+        "pca256": os.path.join(PROJECT_ROOT, "models", "pca_reducer_256.joblib"),
+        "pca128": None,
+        "pca64": os.path.join(PROJECT_ROOT, "models", "enhanced", "pca_model.joblib"),
+    }
+
+    base_report, baseline = bench(corpus, queries, None)
+    reports = {"full768": base_report}
+    for name, path in candidates.items():
+        if path is None:
+            projection = PCAProjection.fit(normalized, int(name[3:]))
+        elif os.path.exists(path):
+            projection = PCAProjection.load(path)
+        else:
+            print("[WARN] reducer not found, skip:", path)
+            continue
+        if projection.input_dim != corpus.shape[1]:
+            print(f"[WARN] {name} expects {projection.input_dim}-d input, skip")
+            continue
+        reports[name], _ = bench(corpus, queries, projection, baseline)
+
+    out = {"rows": len(corpus), "queries": len(queries), "encoded": args.encode, "results": reports}
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+추천기 오프라인 벤치마크 (재현 가능한 쿼리 워크로드)
+
+  python -m project_root1.benchmarks.bench_recommender [--sizes 1000 10000 100000] [--queries 300]
+         [--encoder sbert|hashing] [--cache] [--label v2] [--compare outputs/benchmarks/v1.json]
+
+- 카탈로그: 실제 gangwon_matching_results_sorted.csv + place_embeddings_v2.npy,
+  1k 초과는 임베딩 jitter 로 늘린 합성 카탈로그 (synthetic.py)
+- 워크로드 (app.py build_model_input 의 mode 와 같은 입력 형태)
+    free_text        : 자유 문장 (outputs/recommend_latency_ms.csv 의 기존 4개 쿼리 포함)
+    categorized_tags : season/nature/vibe/target
+    tags_as_text     : 태그 리스트를 공백으로 이은 free_text
+    fallback         : 빈 입력
+- 측정: 워크로드별 처리량(qps), 지연시간 p50/p95/p99, 단계별(recommender.metrics) p50/p95,
+  워크로드 전후 현재 RSS 차이(rss_delta_mb). peak_rss_mb 는 프로세스 전체 최대값(줄지 않음)이라 카탈로그 크기 단위로만 기록
+- --encoder hashing 이면 SBERT 대신 문장 해시로 만든 결정적 벡터를 써서 encode 를 제외한 비용만 본다
+- 결과는 outputs/benchmarks/<label>.json, --compare 로 이전 결과와 비교
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from project_root1.benchmarks.synthetic import synthetic_catalog
+from project_root1.embedding_store import EmbeddingStore
+from project_root1.metrics import StageMetrics
+from project_root1.recommend_module import GangwonPlaceRecommender
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config", "config.yaml")
+CSV_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "gangwon_matching_results_sorted.csv")
+EMBEDDING_PATH = os.path.join(PROJECT_ROOT, "place_embeddings_v2.npy")
+LEGACY_QUERIES = ["가을 감성 바다 카페", "가족 산책 코스", "스릴 액티비티", "역사 유적"]
+WORKLOADS = ("free_text", "categorized_tags", "tags_as_text", "fallback")
+
+
+class HashingEncoder:
+    """문장 해시로 코퍼스 벡터 하나를 골라 노이즈를 섞은 결정적 쿼리 벡터 (encode 비용 제외용)"""
+
+    def __init__(self, corpus: np.ndarray, noise: float = 0.5):
+        self.corpus = EmbeddingStore.normalize(corpus)
+        self.noise = noise
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.corpus.shape[1]
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        out = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:8], "little")
+            rng = np.random.default_rng(seed)
+            base = self.corpus[rng.integers(len(self.corpus))]
+            out.append(base + self.noise * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(len(base)))
+        return np.stack(out).astype(np.float32)
+
+
+def split_tags(value) -> List[str]:
+    return [t.strip() for t in str(value).split(",") if t.strip()] if isinstance(value, str) else []
+
+
+def build_workloads(df: pd.DataFrame, tag_mapping: Dict[str, List[str]], n: int, seed: int = 42) -> Dict[str, List[Dict]]:
+    """워크로드별 입력 n 개 (같은 seed → 같은 입력)"""
+    rng = np.random.default_rng(seed)
+    seasons = sorted({s for v in df["season"].dropna() for s in split_tags(v)})
+    vocab = {cat: sorted({t for v in df[cat].dropna() for t in split_tags(v)}) for cat in ("nature", "vibe", "target")}
+
+    def pick(items, lo=0, hi=2):
+        k = int(rng.integers(lo, hi + 1))
+        return [str(x) for x in rng.choice(items, size=min(k, len(items)), replace=False)] if k else []
+
+    free_text, categorized, as_text = list(LEGACY_QUERIES), [], []
+    keywords = [k for words in tag_mapping.values() for k in words]
+    while len(free_text) < n:
+        free_text.append(" ".join(pick(seasons, 0, 1) + pick(keywords, 1, 3) + ["여행"]))
+    for _ in range(n):
+        item = {cat: pick(vocab[cat]) for cat in vocab}
+        if rng.random() < 0.5:
+            item["season"] = str(rng.choice(seasons))
+        categorized.append({k: v for k, v in item.items() if v})
+        as_text.append({"free_text": " ".join(pick(keywords, 1, 4))})
+
+    return {
+        "free_text": [{"free_text": t} for t in free_text[:n]],
+        "categorized_tags": categorized,
+        "tags_as_text": as_text,
+        "fallback": [{} for _ in range(n)],
+    }
+
+
+def rss_mb() -> Dict[str, float]:
+    """현재 RSS / 지금까지의 프로세스 최대 RSS (MB, ru_maxrss 는 줄지 않음)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    current_mb = None
+    try:
+        with open("/proc/self/statm") as f:
+            current_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        pass
+    return {"rss_mb": current_mb, "peak_rss_mb": peak_mb}
+
+
+def run_workload(rec: GangwonPlaceRecommender, inputs: List[Dict], top_k: int) -> Dict:
+    rec.metrics = StageMetrics()
+    rss_before = rss_mb()["rss_mb"]
+    times = []
+    t_all = time.perf_counter()
+    for x in inputs:
+        t0 = time.perf_counter()
+        rec.recommend_places(x, top_k=top_k)
+        times.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - t_all
+    rss_after = rss_mb()["rss_mb"]
+
+    p = np.percentile(times, [50, 95, 99])
+    stages = {k: {"p50_ms": v["p50_ms"], "p95_ms": v["p95_ms"], "count": v["count"]}
+              for k, v in rec.metrics.snapshot().items()}
+    return {
+        "queries": len(inputs),
+        "qps": len(inputs) / elapsed if elapsed else None,
+        "ms_mean": float(np.mean(times)),
+        "ms_p50": float(p[0]),
+        "ms_p95": float(p[1]),
+        "ms_p99": float(p[2]),
+        "stages": stages,
+        "rss_mb": rss_after,
+        "rss_delta_mb": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+    }
+
+
+def bench_size(size: int, args, df: pd.DataFrame, embeddings: np.ndarray) -> Dict:
+    t0 = time.perf_counter()
+    cat_df, cat_emb = synthetic_catalog(df, embeddings, size)
+    rec = GangwonPlaceRecommender(CONFIG_PATH)
+    rec.df = cat_df
+    rec.place_embeddings = cat_emb
+    if not args.cache:
+        rec.query_cache.max_size = 0
+        rec.result_cache.max_size = 0
+    if args.encoder == "hashing":
+        rec.embedder = HashingEncoder(embeddings)
+    else:
+        rec.load_embedder()
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    workloads = build_workloads(cat_df, rec.tag_mapping, args.queries, seed=args.seed)
+    # 워밍업 (인덱스 빌드, BLAS 초기화)
+    for x in workloads["free_text"][:5]:
+        rec.recommend_places(x, top_k=args.top_k)
+
+    report = {"rows": size, "load_ms": load_ms, **rss_mb(), "workloads": {}}
+    for name in args.workloads:
+        report["workloads"][name] = run_workload(rec, workloads[name], args.top_k)
+        w = report["workloads"][name]
+        print(f"[INFO] rows={size} {name}: {w['qps']:.0f} qps, p50 {w['ms_p50']:.2f} ms, "
+              f"p95 {w['ms_p95']:.2f} ms, RSS delta {w['rss_delta_mb'] or 0.0:+.1f} MB")
+    report.update(peak_rss_mb=rss_mb()["peak_rss_mb"])
+    return report
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline_path: str):
+    """같은 (rows, workload) 끼리 p50/p95/qps 변화율 출력"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    base = {(r["rows"], name): w for r in baseline["results"] for name, w in r["workloads"].items()}
+    print(f"\ncompare with {baseline_path} ({baseline['meta'].get('git_revision')})")
+    print(f"{'rows':>8} {'workload':<18} {'p50 ms':>18} {'p95 ms':>18} {'qps':>18}")
+    for r in current["results"]:
+        for name, w in r["workloads"].items():
+            b = base.get((r["rows"], name))
+            if b is None:
+                continue
+
+            def cell(key):
+                old, new = b[key], w[key]
+                delta = (new - old) / old * 100 if old else 0.0
+                return f"{old:.2f}→{new:.2f} ({delta:+.0f}%)"
+            print(f"{r['rows']:>8} {name:<18} {cell('ms_p50'):>18} {cell('ms_p95'):>18} {cell('qps'):>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GangwonPlaceRecommender offline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=WORKLOADS)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--encoder", choices=["sbert", "hashing"], default="sbert")
+    parser.add_argument("--cache", action="store_true", help="쿼리/결과 캐시 사용 (기본: 끔)")
+    parser.add_argument("--label", default=None, help="결과 파일 이름 (기본: git revision)")
+    parser.add_argument("--out-dir", default=os.path.join(PROJECT_ROOT, "outputs", "benchmarks"))
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    df = pd.read_csv(CSV_PATH)
+    embeddings = np.load(EMBEDDING_PATH)
+    results = [bench_size(size, args, df, embeddings) for size in args.sizes]
+
+    out = {
+        "meta": {
+            "git_revision": git_revision(),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    label = args.label or out["meta"]["git_revision"] or "latest"
+    os.makedirs(args.out_dir, exist_ok=True)
+    out_path = os.path.join(args.out_dir, f"{label}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print("saved:", out_path)
+
+    if args.compare:
+        compare(out, args.compare)
+
+
+if __name__ == "__main__":
+    main()
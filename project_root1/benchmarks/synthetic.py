@@ -0,0 +1,37 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_catalog(df: pd.DataFrame, embeddings: np.ndarray, size: int,
+                      noise: float = 0.3, seed: int = 42) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    실제 강원 카탈로그를 size 행으로 늘린 합성 카탈로그.
+    원본 행을 반복해 태그/메타는 그대로 쓰고, 임베딩에는 가우시안 노이즈를 섞는다.
+    (size <= 원본 행 수면 앞에서부터 자른 원본 그대로)
+    """
+    df = df.reset_index(drop=True)
+    emb = np.asarray(embeddings, dtype=np.float32)
+    if size <= len(df):
+        return df.iloc[:size].reset_index(drop=True), emb[:size]
+
+    rng = np.random.default_rng(seed)
+    src = np.concatenate([np.arange(len(df)), rng.integers(0, len(df), size=size - len(df))])
+    out = df.iloc[src].reset_index(drop=True)
+    out["travel_id"] = np.arange(1, size + 1)
+    out["name"] = [n if i < len(df) else f"{n} #{i}" for i, n in enumerate(out["name"].astype(str))]
+
+    base = emb[src]
+    scale = np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(base.shape[1])
+    jitter = rng.standard_normal(base.shape).astype(np.float32) * scale * noise
+    jitter[:len(df)] = 0.0
+    return out, base + jitter
+
+
+def jitter_queries(embeddings: np.ndarray, n: int, noise: float = 0.5, seed: int = 7) -> np.ndarray:
+    """코퍼스 벡터 근처의 쿼리 벡터 n 개 (정규화 후 노이즈)"""
+    rng = np.random.default_rng(seed)
+    base = embeddings[rng.integers(0, len(embeddings), size=n)].astype(np.float32)
+    base /= np.clip(np.linalg.norm(base, axis=1, keepdims=True), 1e-12, None)
+    return base + noise * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(base.shape[1])
@@ -0,0 +1,52 @@
+"""
+서빙 번들 빌드 (오프라인)
+
+  python -m project_root1.build_bundle
+  python -m project_root1.build_bundle --csv <csv> --embeddings <npy> --out <dir>
+
+CSV + 임베딩을 정규화된 float32 임베딩, multi-hot 태그 행렬, season 코드,
+travel_id 인덱스, compact 메타 테이블로 컴파일하고 manifest(sha256)를 남긴다.
+서버는 RECOMMENDER_LOAD_MODE=bundle 로 CSV 파싱 없이 이 번들만 로딩한다.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from project_root1.artifacts import ServingBundle, export_artifacts, source_signature
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config", "config.yaml")
+DEFAULT_CSV = os.path.join(PROJECT_ROOT, "data", "processed", "gangwon_matching_results_sorted.csv")
+DEFAULT_EMBEDDINGS = os.path.join(PROJECT_ROOT, "place_embeddings_v2.npy")
+
+
+def main():
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    serving = config.get("serving", {})
+
+    parser = argparse.ArgumentParser(description="Build the recommender serving bundle")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--embeddings", default=DEFAULT_EMBEDDINGS)
+    parser.add_argument("--out", default=os.path.join(PROJECT_ROOT, serving.get("artifact_dir", "artifacts/serving")))
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).reset_index(drop=True)
+    out = export_artifacts(
+        df, np.load(args.embeddings), args.out,
+        sources=source_signature([args.csv, args.embeddings]),
+        sbert_model=config.get("model", {}).get("sbert_model"),
+    )
+
+    bundle = ServingBundle(out, verify=True)
+    m = bundle.manifest
+    print(f"bundle {m['bundle_version']} -> {out}")
+    print(f"  rows={m['rows']} dim={m['dim']} files={len(m['files'])} "
+          f"bytes={sum(f['bytes'] for f in m['files'].values())}")
+
+
+if __name__ == "__main__":
+    main()
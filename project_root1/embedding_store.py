@@ -0,0 +1,112 @@
+from typing import Optional
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """
+    장소 임베딩 코퍼스 (N x d).
+    로딩 시 한 번만 L2 정규화 + 연속 float32 로 변환해 두고,
+    요청마다 쿼리만 정규화해 `corpus @ q` 한 번으로 코사인 유사도를 계산한다.
+    (sklearn cosine_similarity 는 매 호출마다 검증/복사/코퍼스 재정규화를 수행)
+    """
+
+    def __init__(self, embeddings: np.ndarray, normalized: bool = False):
+        arr = np.asarray(embeddings)
+        if arr.ndim != 2:
+            raise ValueError(f"place embeddings must be 2-D (N, d), got shape {arr.shape}")
+
+        if normalized and arr.dtype == np.float32 and arr.flags["C_CONTIGUOUS"]:
+            # 이미 정규화된 float32 (예: 미리 변환해 둔 아티팩트) → 복사 없이 사용
+            self.vectors = arr
+        else:
+            self.vectors = np.ascontiguousarray(self.normalize(arr))
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @staticmethod
+    def normalize(x: np.ndarray) -> np.ndarray:
+        """행 단위 L2 정규화 (float32). 영벡터는 그대로 0 (sklearn normalize 와 동일)"""
+        x = np.asarray(x, dtype=np.float32)
+        norms = np.linalg.norm(x, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return x / norms
+
+    def check_dim(self, dim: int, source: Optional[str] = None):
+        if dim != self.dim:
+            where = f" ({source})" if source else ""
+            raise ValueError(
+                f"embedding dimension mismatch: query encoder{where} produces {dim}-d vectors "
+                f"but place embeddings are {self.dim}-d"
+            )
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """쿼리 1개 (d,) → (N,) 코사인 유사도"""
+        q = np.asarray(query).reshape(-1)
+        self.check_dim(q.shape[0])
+        return self.vectors @ self.normalize(q)
+
+    def scores_rows(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """쿼리 1개 (d,) → 지정한 행들만의 코사인 유사도 (len(rows),)"""
+        q = np.asarray(query).reshape(-1)
+        self.check_dim(q.shape[0])
+        return self.vectors[rows] @ self.normalize(q)
+
+    def scores_batch(self, queries: np.ndarray) -> np.ndarray:
+        """쿼리 M개 (M, d) → (M, N) 코사인 유사도"""
+        q = np.atleast_2d(queries)
+        self.check_dim(q.shape[1])
+        return self.normalize(q) @ self.vectors.T
+
+
+class PCAProjection:
+    """
+    PCA 차원 축소 (x - mean) @ components.T  [whiten 이면 / sqrt(explained_variance)]
+    sklearn PCA 를 저장한 joblib(또는 {"reducer": PCA, ...} dict) 에서 배열만 꺼내 쓰거나,
+    코퍼스에서 바로 fit 한다.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray,
+                 explained_variance: Optional[np.ndarray] = None, whiten: bool = False):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)   # (k, d)
+        self.scale = None
+        if whiten and explained_variance is not None:
+            self.scale = (1.0 / np.sqrt(np.asarray(explained_variance, dtype=np.float32)))
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def output_dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> "PCAProjection":
+        import joblib
+
+        obj = joblib.load(path)
+        pca = obj["reducer"] if isinstance(obj, dict) else obj
+        return cls(pca.mean_, pca.components_, getattr(pca, "explained_variance_", None),
+                   bool(getattr(pca, "whiten", False)))
+
+    @classmethod
+    def fit(cls, x: np.ndarray, dim: int) -> "PCAProjection":
+        x = np.asarray(x, dtype=np.float64)
+        mean = x.mean(axis=0)
+        _, s, vt = np.linalg.svd(x - mean, full_matrices=False)
+        dim = min(dim, vt.shape[0])
+        return cls(mean, vt[:dim], (s[:dim] ** 2) / max(len(x) - 1, 1))
+
+    def transform(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[-1] != self.input_dim:
+            raise ValueError(f"PCA expects {self.input_dim}-d input, got {x.shape[-1]}-d")
+        out = (x - self.mean) @ self.components.T
+        return out * self.scale if self.scale is not None else out
@@ -0,0 +1,257 @@
+"""
+쿼리 인코더 백엔드
+
+- torch : sentence-transformers (기본)
+- onnx  : sbert_model 을 ONNX 로 export 해 onnxruntime(CPU)으로 추론, 선택적으로 int8 동적 양자화
+
+config.yaml
+  model:
+    encoder_backend: torch | onnx
+    onnx_dir: models/onnx/kr-sbert   (project_root1 기준)
+    onnx_quantized: false
+
+  python -m project_root1.encoders export [--quantize]     # ONNX export (+ int8)
+  python -m project_root1.encoders parity [--quantized]    # PyTorch 대비 코사인 오차 리포트
+
+onnx 백엔드는 onnxruntime (export 시에는 onnx, torch 도) 가 설치되어 있어야 한다.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ENCODER_CONFIG_FILE = "encoder_config.json"
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+class TorchEncoder:
+    """sentence-transformers 래퍼 (기존 동작)"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str):
+        # import 자체도 무거워서(torch) 필요할 때만 불러온다
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, batch_size=batch_size)
+
+
+class OnnxEncoder:
+    """
+    onnxruntime CPU 추론 + numpy pooling.
+    export_onnx() 가 만든 디렉터리(토크나이저, model(.int8).onnx, encoder_config.json)를 사용한다.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_dir: str, quantized: bool = False, intra_op_threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("encoder_backend=onnx requires `pip install onnxruntime`") from e
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        model_path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path} (run `python -m project_root1.encoders export`)")
+
+        opts = ort.SessionOptions()
+        if intra_op_threads:
+            opts.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.quantized = quantized
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config["dim"])
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        pooling = self.config.get("pooling", "mean")
+        if pooling == "cls":
+            return hidden[:, 0]
+        m = mask[..., None].astype(hidden.dtype)
+        if pooling == "max":
+            return np.where(m > 0, hidden, -1e9).max(axis=1)
+        return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            enc = self.tokenizer(batch, padding=True, truncation=True,
+                                 max_length=self.config.get("max_seq_length", 128), return_tensors="np")
+            feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]                  # (B, T, d)
+            emb = self._pool(hidden, enc["attention_mask"])
+            if self.config.get("normalize"):
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out.append(emb.astype(np.float32))
+        return np.concatenate(out) if out else np.zeros((0, self.get_sentence_embedding_dimension()), np.float32)
+
+
+def resolve_onnx_dir(config: Dict, project_root: str) -> str:
+    onnx_dir = config.get("model", {}).get("onnx_dir", "models/onnx/kr-sbert")
+    return onnx_dir if os.path.isabs(onnx_dir) else os.path.join(project_root, onnx_dir)
+
+
+def load_encoder(config: Dict, model_name: str, project_root: str):
+    """config.yaml 의 model.encoder_backend 에 맞는 인코더 생성"""
+    model_conf = config.get("model", {})
+    backend = model_conf.get("encoder_backend", "torch")
+    if backend == "onnx":
+        return OnnxEncoder(resolve_onnx_dir(config, project_root),
+                           quantized=bool(model_conf.get("onnx_quantized", False)))
+    if backend != "torch":
+        raise ValueError(f"unknown encoder_backend: {backend}")
+    return TorchEncoder(model_name)
+
+
+def export_onnx(model_name: str, out_dir: str, quantize: bool = False, opset: int = 14) -> str:
+    """SentenceTransformer 의 transformer 본체를 ONNX 로 export (pooling/normalize 는 numpy 에서 처리)"""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0]
+    pooling = next((m for m in st if isinstance(m, models.Pooling)), None)
+    if pooling is None or pooling.pooling_mode_mean_tokens:
+        pooling_mode = "mean"
+    elif pooling.pooling_mode_cls_token:
+        pooling_mode = "cls"
+    elif pooling.pooling_mode_max_tokens:
+        pooling_mode = "max"
+    else:
+        raise ValueError(f"unsupported pooling for ONNX export: {pooling.get_pooling_mode_str()}")
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(*args, return_dict=False)[0]
+
+    tokenizer = transformer.tokenizer
+    dummy = tokenizer(["강원도 가족 여행지 추천"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, ONNX_FILE)
+    wrapper = LastHiddenState(transformer.auto_model).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper, tuple(dummy[n] for n in input_names), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=opset,
+        )
+    tokenizer.save_pretrained(out_dir)
+
+    with open(os.path.join(out_dir, ENCODER_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "pooling": pooling_mode,
+            "normalize": any(isinstance(m, models.Normalize) for m in st),
+            "dim": st.get_sentence_embedding_dimension(),
+            "max_seq_length": transformer.max_seq_length,
+        }, f, ensure_ascii=False, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(out_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+    return out_dir
+
+
+def parity_check(reference, candidate, texts: List[str], place_embeddings: Optional[np.ndarray] = None,
+                 top_k: int = 10) -> Dict:
+    """
+    두 인코더의 임베딩 코사인 오차 리포트.
+    place_embeddings 가 있으면 각 텍스트를 쿼리로 썼을 때 top_k 결과 겹침 비율도 계산
+    """
+    t0 = time.perf_counter()
+    ref = reference.encode(texts, convert_to_numpy=True)
+    t1 = time.perf_counter()
+    cand = candidate.encode(texts, convert_to_numpy=True)
+    t2 = time.perf_counter()
+
+    def norm(x):
+        x = np.asarray(x, dtype=np.float32)
+        return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+    ref_n, cand_n = norm(ref), norm(cand)
+    cos = (ref_n * cand_n).sum(axis=1)
+    report = {
+        "texts": len(texts),
+        "cosine_mean": float(cos.mean()),
+        "cosine_min": float(cos.min()),
+        "cosine_p01": float(np.percentile(cos, 1)),
+        "drift_max": float(1.0 - cos.min()),
+        "reference_ms_per_text": (t1 - t0) * 1000 / len(texts),
+        "candidate_ms_per_text": (t2 - t1) * 1000 / len(texts),
+    }
+    if place_embeddings is not None:
+        corpus = norm(place_embeddings)
+        ref_top = np.argsort(-(ref_n @ corpus.T), axis=1)[:, :top_k]
+        cand_top = np.argsort(-(cand_n @ corpus.T), axis=1)[:, :top_k]
+        overlap = [len(set(a) & set(b)) / top_k for a, b in zip(ref_top, cand_top)]
+        report[f"top{top_k}_overlap_mean"] = float(np.mean(overlap))
+    return report
+
+
+def main():
+    import pandas as pd
+    import yaml
+
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(project_root, "config", "config.yaml"), "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    model_name = config.get("model", {}).get("sbert_model", "snunlp/KR-SBERT-V40K-klueNLI-augSTS")
+    onnx_dir = resolve_onnx_dir(config, project_root)
+
+    parser = argparse.ArgumentParser(description="ONNX query encoder export / parity check")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_export = sub.add_parser("export")
+    p_export.add_argument("--quantize", action="store_true", help="int8 동적 양자화 모델도 생성")
+    p_parity = sub.add_parser("parity")
+    p_parity.add_argument("--quantized", action="store_true")
+    p_parity.add_argument("--sample", type=int, default=200)
+    p_parity.add_argument("--out", default=os.path.join(project_root, "outputs", "encoder_parity.json"))
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        print("exported:", export_onnx(model_name, onnx_dir, quantize=args.quantize))
+        return
+
+    # 기존 코퍼스(장소 이름 + 소개)로 PyTorch 대비 오차 측정
+    df = pd.read_csv(os.path.join(project_root, "data", "processed", "gangwon_matching_results_sorted.csv"))
+    texts = (df["name"].fillna("") + " " + df["short_description"].fillna("")).str.strip().tolist()
+    rng = np.random.default_rng(42)
+    idx = rng.choice(len(texts), size=min(args.sample, len(texts)), replace=False)
+    texts = [texts[i] for i in idx]
+
+    report = parity_check(TorchEncoder(model_name), OnnxEncoder(onnx_dir, quantized=args.quantized), texts,
+                          place_embeddings=np.load(os.path.join(project_root, "place_embeddings_v2.npy")))
+    report["quantized"] = args.quantized
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
+
+
+class PoolOverloaded(RuntimeError):
+    """실행 중 + 대기 중인 추론이 한도를 넘음 (→ 503)"""
+
+
+class InferenceTimeout(TimeoutError):
+    """요청별 제한 시간 안에 추론이 끝나지 않음"""
+
+
+class InferencePool:
+    """
+    CPU 추론(SBERT encode + 점수 계산) 전용 제한 스레드 풀.
+    - workers: 동시에 추론하는 스레드 수 (torch/numpy 연산은 GIL 을 놓기 때문에 스레드로 충분하고,
+      프로세스 풀과 달리 모델/코퍼스를 워커마다 다시 올리지 않는다)
+    - max_queue: 실행 대기 한도. 실행 중 + 대기 중이 workers + max_queue 를 넘으면 바로 PoolOverloaded
+    - timeout_seconds: 요청 스레드가 결과를 기다리는 최대 시간 (넘으면 InferenceTimeout,
+      이미 시작된 추론은 끝날 때까지 자리를 차지하므로 과부하 판단에 그대로 반영된다)
+    HTTP 요청 스레드는 추론을 여기에 넘기고 기다리기만 하므로,
+    DB 위주 엔드포인트(/login, /mypage, /health)는 다른 요청 스레드에서 계속 처리된다.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, timeout_seconds: Optional[float] = 10.0):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout_seconds = float(timeout_seconds) if timeout_seconds else None
+        # 스레드는 첫 submit 때 생성됨 (gunicorn preload 시 fork 전에 스레드가 생기지 않음)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, fn, *args, **kwargs):
+        """자리가 없으면 기다리지 않고 PoolOverloaded"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolOverloaded(f"inference queue full ({self.workers} running + {self.max_queue} queued)")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn, *args, timeout: Optional[float] = None, **kwargs):
+        """submit 후 결과 대기 (timeout 미지정 시 timeout_seconds)"""
+        t0 = time.perf_counter()
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout if timeout is not None else self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()  # 아직 대기 중이면 실행하지 않음
+            with self._lock:
+                self.timeouts += 1
+            raise InferenceTimeout(f"inference did not finish within {self.timeout_seconds}s")
+        finally:
+            with self._lock:
+                self.total_wait_ms += (time.perf_counter() - t0) * 1000
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            done = self.completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout_seconds,
+                "in_flight": self.in_flight,
+                "completed": done,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / done, 3) if done else 0.0,
+            }
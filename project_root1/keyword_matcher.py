@@ -0,0 +1,105 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# config.yaml 에 keywords 섹션이 없을 때 쓰는 기본값
+DEFAULT_SYNONYMS = {
+    "바다": ["해변", "바닷가"],
+    "계곡": ["물놀이"],
+    "사진명소": ["포토스팟", "인생샷"],
+    "조용한": ["한적", "조용"],
+    "힐링": ["치유", "휴식"],
+}
+DEFAULT_SEASONS = ["봄", "여름", "가을", "겨울"]
+
+
+class KeywordMatcher:
+    """
+    키워드/동의어 다중 패턴 매처 (Aho-Corasick 오토마톤).
+    - vocab: 카테고리 → 대표 키워드 목록 (tag_mapping 형태, season 등 카테고리 추가 가능)
+    - synonyms: 대표 키워드 → 동의어 목록. 동의어가 나오면 대표 키워드로 매칭
+    오토마톤은 생성 시 한 번만 만들고, 문장은 한 번만 훑어서 모든 카테고리의 키워드를 찾는다.
+    (키워드마다 `in` 으로 부분 문자열을 검사하던 것과 같은 결과, 비용은 문장 길이 + 매칭 수에 비례)
+    """
+
+    def __init__(self, vocab: Dict[str, List[str]], synonyms: Optional[Dict[str, List[str]]] = None):
+        self.categories = list(vocab)
+        synonyms = synonyms or {}
+
+        # 결과를 vocab 순서로 돌려주기 위한 (카테고리, 키워드) → 순번
+        self._order: Dict[Tuple[str, str], int] = {}
+        patterns: Dict[str, set] = {}
+        for cat, keywords in vocab.items():
+            for kw in keywords or []:
+                kw = str(kw).strip().lower()
+                if not kw or (cat, kw) in self._order:
+                    continue
+                self._order[(cat, kw)] = len(self._order)
+                for p in [kw] + [str(s).strip().lower() for s in synonyms.get(kw, [])]:
+                    if p:
+                        patterns.setdefault(p, set()).add((cat, kw))
+
+        self.pattern_count = len(patterns)
+        self._build(patterns)
+
+    @classmethod
+    def from_config(cls, tag_mapping: Dict[str, List[str]], conf: Optional[Dict]) -> "KeywordMatcher":
+        """config.yaml 의 keywords 섹션 (synonyms, season) 과 tag_mapping 으로 생성"""
+        conf = conf or {}
+        vocab = dict(tag_mapping)
+        vocab["season"] = list(conf.get("season", DEFAULT_SEASONS) or [])
+        return cls(vocab, conf.get("synonyms", DEFAULT_SYNONYMS) or {})
+
+    # ---------- 오토마톤 ----------
+    def _build(self, patterns: Dict[str, set]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[frozenset] = [frozenset()]
+        for pattern, hits in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(frozenset())
+                node = nxt
+            out[node] = out[node] | hits
+
+        # 실패 링크 (BFS), 출력은 실패 링크를 따라 미리 합쳐 둔다
+        fail = [0] * len(goto)
+        q = deque(goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] | out[fail[nxt]]
+                q.append(nxt)
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def _scan(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+    # ---------- 매칭 ----------
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """문장 → {카테고리: [대표 키워드, ...]} (vocab 순서, 대소문자 무시)"""
+        found = self._scan((text or "").strip().lower())
+        result: Dict[str, List[str]] = {cat: [] for cat in self.categories}
+        for cat, kw in sorted(found, key=self._order.__getitem__):
+            result[cat].append(kw)
+        return result
+
+    def match_batch(self, texts: Iterable[str]) -> List[Dict[str, List[str]]]:
+        return [self.match(t) for t in texts]
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 단계별 지연시간 히스토그램 버킷 (초) - Prometheus histogram 의 le 값
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    고정 버킷 누적 카운트 + 최근 window 개 관측값 (p50/p95/p99 계산용).
+    버킷은 워커/인스턴스끼리 합산 가능하고, 분위수는 최근 구간 기준이다.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.total = 0.0
+        self.count = 0
+        self.recent: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        i = int(np.searchsorted(self.buckets, seconds, side="left"))
+        self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        if not self.recent:
+            return {q: 0.0 for q in QUANTILES}
+        values = np.percentile(np.fromiter(self.recent, dtype=float), [q * 100 for q in QUANTILES])
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class StageMetrics:
+    """
+    추천 파이프라인 단계별(parse, encode, similarity, tag_score, topk, travels_join, response_build ...)
+    지연시간 집계. 프로세스(워커) 단위라서 gunicorn 워커가 여러 개면 스크랩할 때마다 한 워커의 값이 보인다.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, window: int = 2048):
+        self._buckets = tuple(buckets)
+        self._window = window
+        self._hists: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = LatencyHistogram(self._buckets, self._window)
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """단계별 count / 평균 / p50·p95·p99 (ms)"""
+        with self._lock:
+            out = {}
+            for stage, hist in sorted(self._hists.items()):
+                q = hist.quantiles()
+                out[stage] = {
+                    "count": hist.count,
+                    "avg_ms": round(hist.total / hist.count * 1000, 3) if hist.count else 0.0,
+                    **{f"p{int(k * 100)}_ms": round(v * 1000, 3) for k, v in q.items()},
+                }
+            return out
+
+    def render_prometheus(self, prefix: str = "recommend",
+                          gauges: Optional[List[Tuple[str, str, Dict[str, str], float]]] = None,
+                          counters: Optional[List[Tuple[str, str, Dict[str, str], float]]] = None) -> str:
+        """
+        Prometheus text format (0.0.4).
+        gauges: (이름, 설명, 라벨, 값) - 캐시 크기/처리 중 요청 수 등 오르내리는 값
+        counters: 같은 형식, 단조 증가 누적값 (이름은 _total 로 끝남, rate() 용)
+        """
+        lines = []
+        hist_name = f"{prefix}_stage_duration_seconds"
+        summ_name = f"{prefix}_stage_latency_seconds"
+        with self._lock:
+            items = sorted(self._hists.items())
+            lines.append(f"# HELP {hist_name} Recommend pipeline stage latency histogram.")
+            lines.append(f"# TYPE {hist_name} histogram")
+            for stage, hist in items:
+                cumulative = 0
+                for le, c in zip(list(hist.buckets) + [float("inf")], hist.counts):
+                    cumulative += c
+                    le_str = "+Inf" if le == float("inf") else repr(le)
+                    lines.append(f'{hist_name}_bucket{{stage="{stage}",le="{le_str}"}} {cumulative}')
+                lines.append(f'{hist_name}_sum{{stage="{stage}"}} {hist.total!r}')
+                lines.append(f'{hist_name}_count{{stage="{stage}"}} {hist.count}')
+
+            lines.append(f"# HELP {summ_name} Recommend pipeline stage latency quantiles over recent requests.")
+            lines.append(f"# TYPE {summ_name} summary")
+            for stage, hist in items:
+                for q, v in hist.quantiles().items():
+                    lines.append(f'{summ_name}{{stage="{stage}",quantile="{q}"}} {v!r}')
+                lines.append(f'{summ_name}_sum{{stage="{stage}"}} {hist.total!r}')
+                lines.append(f'{summ_name}_count{{stage="{stage}"}} {hist.count}')
+
+        seen = set()
+        for kind, metrics in (("gauge", gauges), ("counter", counters)):
+            for name, help_text, labels, value in metrics or []:
+                if name not in seen:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    seen.add(name)
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {float(value)!r}" if label_str else f"{name} {float(value)!r}")
+        return "\n".join(lines) + "\n"
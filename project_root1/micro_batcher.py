@@ -0,0 +1,111 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 요청을 짧은 시간 창(window_ms) 동안 모아 fn(items) 한 번으로 처리하는 동적 배치기.
+    - 첫 요청이 들어온 뒤 window_ms 가 지나거나 max_batch 개가 모이면 바로 실행
+    - fn 은 items 리스트를 받아 같은 순서의 결과 시퀀스를 돌려줘야 한다
+    - 배치 스레드는 첫 submit 때 시작 (gunicorn fork 이후 워커마다 새로 시작됨)
+    """
+
+    def __init__(self, fn: Callable[[List], List], window_ms: float = 3.0, max_batch: int = 32,
+                 name: str = "micro-batcher", history: int = 1024):
+        self.fn = fn
+        self.window = max(float(window_ms), 0.0) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+        # 지표: 배치 크기 분포, 큐 대기 시간(요청 도착 → 배치 실행 시작)
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.size_hist: Dict[int, int] = {}
+        self._delays_ms: deque = deque(maxlen=history)
+
+    # ---------- 제출 ----------
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                self._queue = queue.Queue()  # fork 로 복사된 큐/스레드는 버림
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, item) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout: Optional[float] = None):
+        return self.submit(item).result(timeout=timeout)
+
+    # ---------- 배치 루프 ----------
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # 창이 이미 지났어도 큐에 쌓여 있는 것은 함께 처리
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self._record(len(batch), [(started - t) * 1000 for _, _, t in batch])
+            try:
+                results = self.fn([item for item, _, _ in batch])
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                with self._stats_lock:
+                    self.errors += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _record(self, size: int, delays_ms: List[float]):
+        with self._stats_lock:
+            self.batches += 1
+            self.items += size
+            self.size_hist[size] = self.size_hist.get(size, 0) + 1
+            self._delays_ms.extend(delays_ms)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            delays = np.array(self._delays_ms, dtype=float)
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "avg_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+                "batch_size_hist": {str(k): v for k, v in sorted(self.size_hist.items())},
+                "queue_delay_ms_p50": round(float(np.percentile(delays, 50)), 3) if len(delays) else 0.0,
+                "queue_delay_ms_p95": round(float(np.percentile(delays, 95)), 3) if len(delays) else 0.0,
+                "queue_delay_ms_max": round(float(delays.max()), 3) if len(delays) else 0.0,
+            }
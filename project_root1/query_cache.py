@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+
+
+class LRUCache:
+    """
+    크기(LRU) + TTL 기반으로 항목을 내보내는 스레드 안전 캐시.
+    - max_size <= 0 이면 캐시를 사용하지 않음
+    - ttl_seconds 가 None/0 이면 만료 없음
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = int(max_size or 0)
+        self.ttl_seconds = float(ttl_seconds) if ttl_seconds else None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key → (저장시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            if self._expired(item[0], now):
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value, stored_at: Optional[float] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (stored_at if stored_at is not None else time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class QueryEmbeddingCache(LRUCache):
+    """
+    SentenceTransformer.encode 앞단의 쿼리 임베딩 캐시.
+    키는 정규화된 쿼리 문자열이며, persist_path 가 있으면 .npz 로 저장/복원해
+    재시작한 워커도 바로 캐시가 채워진 상태로 시작한다.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: Optional[float] = None,
+                 persist_path: Optional[str] = None, model_name: str = ""):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.persist_path = persist_path
+        self.model_name = model_name
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """NFC 정규화 + 연속 공백 정리 (태그 조합으로 만든 같은 문장은 같은 키가 됨)"""
+        text = unicodedata.normalize("NFC", text or "")
+        return re.sub(r"\s+", " ", text).strip()
+
+    def set(self, key, value, stored_at: Optional[float] = None):
+        value = np.asarray(value, dtype=np.float32)
+        value.setflags(write=False)  # 캐시된 벡터를 호출 측에서 수정하지 못하게
+        super().set(key, value, stored_at=stored_at)
+
+    # ---------- 디스크 저장/복원 ----------
+    def load(self) -> int:
+        """persist_path 에서 캐시 복원. 복원한 항목 수 반환 (모델이 다르거나 파일이 없으면 0)"""
+        if not self.enabled or not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as z:
+                if str(z["model_name"]) != self.model_name:
+                    print("[WARN] query cache model mismatch, skip:", self.persist_path)
+                    return 0
+                keys, vectors, stamps = z["keys"], z["vectors"], z["stored_at"]
+        except Exception as e:
+            print("[WARN] query cache load failed:", e)
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for k, v, t in zip(keys.tolist(), vectors, stamps.tolist()):
+            if self._expired(t, now):
+                continue
+            self.set(k, v, stored_at=t)
+            loaded += 1
+        return loaded
+
+    def save(self) -> int:
+        """현재 캐시를 persist_path 에 원자적으로 저장. 저장한 항목 수 반환"""
+        if not self.enabled or not self.persist_path:
+            return 0
+        with self._lock:
+            items = list(self._data.items())
+        if not items:
+            return 0
+
+        keys = np.array([k for k, _ in items], dtype=str)
+        stamps = np.array([t for _, (t, _) in items], dtype=np.float64)
+        vectors = np.stack([v for _, (_, v) in items]).astype(np.float32)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        tmp_path = f"{self.persist_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, keys=keys, vectors=vectors, stored_at=stamps,
+                 model_name=np.array(self.model_name))
+        os.replace(tmp_path, self.persist_path)
+        return len(items)
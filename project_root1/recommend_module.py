@@ -1,31 +1,127 @@
 import os
+import copy
+import json
+import hashlib
+import logging
+import threading
+import time
 import pandas as pd
 import numpy as np
 import yaml
-import ast
 from typing import Dict, List, Tuple
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from project_root1.tag_index import TagIndex
+from project_root1.embedding_store import EmbeddingStore, PCAProjection
+from project_root1.query_cache import LRUCache, QueryEmbeddingCache
+from project_root1.topk import select_top_k
+from project_root1.encoders import load_encoder
+from project_root1.vector_index import build_vector_index
+from project_root1.micro_batcher import MicroBatcher
+from project_root1.metrics import StageMetrics
+from project_root1.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
 
 class GangwonPlaceRecommender:
     def __init__(self, config_path: str):
         with open(config_path, "r", encoding="utf-8") as f:
             self.config = yaml.safe_load(f)
-
-        # 외부(app.py)에서 셋업됨
-        self.df: pd.DataFrame = None
-        self.place_embeddings: np.ndarray = None
-
-        # SBERT (쿼리 임베딩용)
+        # project_root1 디렉터리 (config 의 상대경로 기준)
+        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(config_path)))
+
+        # 외부(app.py)에서 셋업됨 (df 대입 시 태그 인덱스도 함께 생성)
+        # df/place_embeddings 가 바뀔 때마다 _data_version 이 올라가 결과 캐시가 무효화된다
+        self._data_version = 0
+        self._tag_index: TagIndex = None
+        self._embedding_store: EmbeddingStore = None
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+
+        # PCA 축소 차원 서빙 (model.reduced_serving): 쿼리를 저장된 PCA 로 투영해 축소된 코퍼스와 비교
+        # pca_reducer 가 없으면 코퍼스를 대입할 때 reduced_dim 으로 PCA 를 fit 한다
+        # (pca_reducer 가 있으면 차원은 reducer 가 정하고 reduced_dim 은 쓰지 않음)
+        model_conf = self.config.get("model", {})
+        self.reduced_serving = bool(model_conf.get("reduced_serving", False))
+        self.projection: PCAProjection = None
+        self._pca_reducer_path = None
+        if self.reduced_serving and model_conf.get("pca_reducer"):
+            path = model_conf["pca_reducer"]
+            self._pca_reducer_path = path if os.path.isabs(path) else os.path.join(self.project_root, path)
+            self.projection = PCAProjection.load(self._pca_reducer_path)
+            reduced_dim = model_conf.get("reduced_dim")
+            if reduced_dim is not None and int(reduced_dim) != self.projection.output_dim:
+                logger.warning("model.reduced_dim=%s is ignored: pca_reducer %s projects to %d dims",
+                               reduced_dim, self._pca_reducer_path, self.projection.output_dim)
+
+        # 유사도 후보 검색 인덱스 (retrieval.index: exact | ivf | hnsw) - 코퍼스가 바뀌면 처음 검색할 때 다시 빌드
+        self.retrieval_conf = self.config.get("retrieval", {}) or {}
+        # 태그 역색인 prefilter + recall guard (후보만으로 top-k 가 보장되지 않으면 전체 계산)
+        self.prefilter = bool(self.retrieval_conf.get("prefilter", False))
+        self.recall_guard = bool(self.retrieval_conf.get("recall_guard", True))
+        self.retrieval_stats = {"candidate_queries": 0, "candidates_scored": 0, "fallbacks": 0}
+        self._vector_index = None
+        self._index_lock = threading.Lock()
+        self.bundle = None  # 서빙 번들에서 로딩한 경우 (project_root1.artifacts.ServingBundle)
+        self.df = None
+        self.place_embeddings = None
+
+        # SBERT (쿼리 임베딩용) - 첫 유사도 계산 때 로딩 (운영에서는 warm_up() 으로 미리 로딩)
         model_name = self.config.get("model", {}).get(
             "sbert_model", "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
         )
-        self.embedder = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.encoder_backend = self.config.get("model", {}).get("encoder_backend", "torch")
+
+        # 쿼리 임베딩 캐시 (같은 태그 조합 → 같은 free_text 는 encode 생략)
+        cache_conf = self.config.get("cache", {}).get("query_embedding", {})
+        persist_path = cache_conf.get("persist_path")
+        if persist_path and not os.path.isabs(persist_path):
+            persist_path = os.path.join(self.project_root, persist_path)
+        self.query_cache = QueryEmbeddingCache(
+            max_size=cache_conf.get("max_size", 2048),
+            ttl_seconds=cache_conf.get("ttl_seconds"),
+            persist_path=persist_path,
+            # 백엔드(torch/onnx/int8)마다 임베딩이 미세하게 달라서 캐시 파일도 구분
+            model_name=f"{model_name}@{self.encoder_backend_tag}",
+        )
+        self.query_cache.load()
+
+        # 추천 결과 캐시 (parse 결과 + top_k + 데이터 버전이 같으면 재사용)
+        result_conf = self.config.get("cache", {}).get("results", {})
+        self.result_cache = LRUCache(
+            max_size=result_conf.get("max_size", 1024),
+            ttl_seconds=result_conf.get("ttl_seconds"),
+        )
+
+        # 단계별 지연시간 (parse/encode/similarity/tag_score/topk, app.py 에서 travels_join/response_build 추가)
+        self.metrics = StageMetrics()
+
+        # 동적 배치 (batching.enabled): 동시에 들어온 유사도 계산을 window_ms 동안 모아
+        # SBERT encode 1회 + (B x N) 행렬곱 1회로 처리하고 요청마다 자기 행을 돌려준다
+        batch_conf = self.config.get("batching", {}) or {}
+        self.batcher: MicroBatcher = None
+        if batch_conf.get("enabled", False):
+            self.batcher = MicroBatcher(
+                self._calc_similarity_batch,
+                window_ms=batch_conf.get("window_ms", 3),
+                max_batch=batch_conf.get("max_batch", 32),
+                name="similarity-batcher",
+            )
 
         # 가중치
         rec_conf = self.config.get("recommendation", {})
         self.sim_w = float(rec_conf.get("similarity_weight", 0.6))
         self.tag_w = float(rec_conf.get("tag_weight", 0.4))
+        # categorized_tags 입력을 SBERT 없이 태그 점수만으로 추천할지 (요청별로 덮어쓰기 가능)
+        self.tag_only_categorized = bool(rec_conf.get("tag_only_categorized", False))
+
+        # 개인화: 사용자 프로필 벡터(별점/북마크 가중 평균, user_profile.py)와의 유사도를 섞음
+        #   hybrid = (1 - weight) * hybrid + weight * 프로필 유사도
+        pers_conf = self.config.get("personalization", {}) or {}
+        self.personalization_enabled = bool(pers_conf.get("enabled", True))
+        self.personal_w = float(pers_conf.get("weight", 0.2))
+        self.profile_bookmark_weight = float(pers_conf.get("bookmark_weight", 1.0))
+        self.profile_min_weight = float(pers_conf.get("min_weight", 1.0))
 
         # 간단 태그 매핑(키워드 → 카테고리)
         self.tag_mapping = {
@@ -33,6 +129,187 @@ class GangwonPlaceRecommender:
             "vibe": ["감성", "활력", "휴식", "산책", "모험", "힐링", "사진명소", "액티비티", "조용한"],
             "target": ["연인", "가족", "친구", "혼자"]
         }
+        # free_text 태그 추출기: tag_mapping + config 의 keywords(동의어, season) 로 한 번만 생성
+        self.keyword_matcher = KeywordMatcher.from_config(self.tag_mapping, self.config.get("keywords"))
+
+    # ---------- 데이터 ----------
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._df
+
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        # CSV 로딩 시점에 한 번만 태그 문자열을 파싱해 둔다
+        self._set_df(value, TagIndex.from_df(value) if value is not None else None)
+
+    @property
+    def place_embeddings(self) -> np.ndarray:
+        """L2 정규화된 float32 코퍼스 (N x d)"""
+        return self._embedding_store.vectors if self._embedding_store is not None else None
+
+    @place_embeddings.setter
+    def place_embeddings(self, value: np.ndarray):
+        # 대입 시 한 번만 정규화/float32 변환 (원본 배열은 보관하지 않음)
+        self._set_embedding_store(EmbeddingStore(value) if value is not None else None)
+
+    def set_data(self, df: pd.DataFrame, embedding_store: EmbeddingStore, tag_index: TagIndex = None):
+        """
+        미리 만들어 둔 임베딩 스토어/태그 인덱스로 데이터를 교체
+        (mmap 아티팩트 로딩 등 태그 문자열 재파싱이 필요 없는 경우)
+        """
+        if tag_index is not None and len(tag_index) != len(df):
+            raise ValueError(f"tag index rows ({len(tag_index)}) != df rows ({len(df)})")
+        self._set_df(df, tag_index if tag_index is not None else TagIndex.from_df(df))
+        self._set_embedding_store(embedding_store)
+
+    def _set_df(self, df: pd.DataFrame, tag_index: TagIndex):
+        self._df = df
+        self._row_records = None
+        self._travel_rows = None
+        self.bundle = None
+        self._tag_index = tag_index
+        # 동점 정렬 기준 (travel_id 오름차순)
+        self._tie_keys = df["travel_id"].to_numpy() if df is not None and "travel_id" in df.columns else None
+        self._data_version += 1
+
+    def _set_embedding_store(self, store: EmbeddingStore):
+        if store is not None and self.reduced_serving:
+            if self._pca_reducer_path is None:
+                self.projection = PCAProjection.fit(store.vectors, int(self.config.get("model", {}).get("reduced_dim", 128)))
+            store = EmbeddingStore(self.projection.transform(store.vectors))
+        self._embedding_store = store
+        self._vector_index = None
+        if store is not None and self._embedder is not None:
+            self._check_encoder_dim(self._embedder.get_sentence_embedding_dimension())
+        self._data_version += 1
+
+    def _check_encoder_dim(self, encoder_dim: int):
+        source = f"SBERT/{self.encoder_backend_tag}"
+        if self.projection is not None:
+            if encoder_dim != self.projection.input_dim:
+                raise ValueError(
+                    f"embedding dimension mismatch: query encoder ({source}) produces {encoder_dim}-d vectors "
+                    f"but the PCA reducer expects {self.projection.input_dim}-d input"
+                )
+        elif self._embedding_store is not None:
+            self._embedding_store.check_dim(encoder_dim, source=source)
+
+    def _project_queries(self, qv: np.ndarray) -> np.ndarray:
+        """
+        축소 차원 서빙이면 쿼리를 PCA 로 투영 ((d,) 또는 (M, d)).
+        코퍼스와 같은 공간이 되도록 L2 정규화한 뒤 투영한다 (PCA 는 정규화된 벡터로 fit,
+        평균 벡터가 커서 원본 크기의 쿼리를 중심화하면 방향이 달라짐)
+        """
+        if self.projection is None:
+            return qv
+        return self.projection.transform(EmbeddingStore.normalize(qv))
+
+    # ---------- SBERT 로딩 ----------
+    @property
+    def embedder(self):
+        """SentenceTransformer (처음 접근할 때 로딩)"""
+        if self._embedder is None:
+            self.load_embedder()
+        return self._embedder
+
+    @embedder.setter
+    def embedder(self, value):
+        self._embedder = value
+
+    @property
+    def encoder_backend_tag(self) -> str:
+        if self.encoder_backend == "onnx" and self.config.get("model", {}).get("onnx_quantized"):
+            return "onnx-int8"
+        return self.encoder_backend
+
+    @property
+    def embedder_loaded(self) -> bool:
+        return self._embedder is not None
+
+    def load_embedder(self):
+        """
+        쿼리 인코더 로딩 (여러 스레드가 동시에 불러도 한 번만 로딩).
+        config.yaml model.encoder_backend: torch(sentence-transformers) | onnx(onnxruntime)
+        """
+        with self._embedder_lock:
+            if self._embedder is None:
+                t0 = time.perf_counter()
+                embedder = load_encoder(self.config, self.model_name, self.project_root)
+                self._check_encoder_dim(embedder.get_sentence_embedding_dimension())
+                self._embedder = embedder
+                logger.info("SBERT loaded: %s [%s] (%.0f ms)", self.model_name, self.encoder_backend_tag,
+                            (time.perf_counter() - t0) * 1000)
+        return self._embedder
+
+    def warm_up(self) -> float:
+        """운영용 워밍업: 모델 로딩 + encode 1회 (캐시 우회). 소요 시간(ms) 반환"""
+        t0 = time.perf_counter()
+        self.embedder.encode(["여행지 추천"], convert_to_numpy=True)
+        return (time.perf_counter() - t0) * 1000
+
+    def _get_row_records(self) -> List[Dict]:
+        """추천 결과에 들어가는 행별 고정 필드 (처음 한 번만 만들어 df.iloc 비용 제거)"""
+        if self._row_records is None:
+            records = []
+            for row in self.df.to_dict("records"):
+                # travel_id 꼭 포함!
+                records.append({
+                    "travel_id": int(row["travel_id"]),
+                    "name": row.get("name"),
+                    "season": row.get("season"),
+                    "nature": row.get("nature_list", []),
+                    "vibe": row.get("vibe_list", []),
+                    "target": row.get("target_list", []),
+                    "description": row.get("short_description"),
+                })
+            self._row_records = records
+        return self._row_records
+
+    def profile_features(self, travel_ids: List[int]) -> Dict[int, Tuple[np.ndarray, List[str]]]:
+        """
+        프로필 갱신용: travel_id → (정규화된 임베딩 행, 장소 태그). 카탈로그에 없는 id 는 빠진다.
+        벡터는 유사도 계산과 같은 공간 (reduced_serving 이면 PCA 축소 차원)
+        """
+        if self._travel_rows is None:
+            self._travel_rows = {int(t): i for i, t in enumerate(self.df["travel_id"].to_numpy())}
+        vectors = self._embedding_store.vectors
+        tag_index = self.tag_index  # 태그는 점수 계산과 같은 태그 인덱스에서 (df 의 *_list 컬럼은 비어 있을 수 있음)
+        out = {}
+        for tid in travel_ids:
+            row = self._travel_rows.get(int(tid))
+            if row is None:
+                continue
+            out[int(tid)] = (vectors[row], tag_index.row_tags(row))
+        return out
+
+    @property
+    def embedding_store(self) -> EmbeddingStore:
+        return self._embedding_store
+
+    @property
+    def vector_index(self):
+        """retrieval.index 설정의 후보 검색 인덱스 (처음 사용할 때 빌드)"""
+        if self._vector_index is None and self._embedding_store is not None:
+            with self._index_lock:
+                if self._vector_index is None:
+                    t0 = time.perf_counter()
+                    index = build_vector_index(self._embedding_store, self.retrieval_conf)
+                    if index.approximate:
+                        logger.info("vector index built: %s (%d rows, %.0f ms)", index.name, len(index),
+                                    (time.perf_counter() - t0) * 1000)
+                    self._vector_index = index
+        return self._vector_index
+
+    @property
+    def cache_stamp(self) -> Tuple:
+        """결과 캐시 무효화용 스탬프: 데이터 버전 + 하이브리드 가중치"""
+        return (self._data_version, self.sim_w, self.tag_w)
+
+    @property
+    def tag_index(self) -> TagIndex:
+        if self._tag_index is None and self._df is not None:
+            self._tag_index = TagIndex.from_df(self._df)
+        return self._tag_index
 
     # ---------- 입력 파싱/정규화 ----------
     def _normalize_tags(self, items: List[str]) -> List[str]:
@@ -53,54 +330,12 @@ class GangwonPlaceRecommender:
 
     def _extract_tags_from_text(self, text: str) -> Dict[str, List[str]]:
         """
-        free_text에 포함된 단어를 기반으로 nature / vibe / target을 추출
-        self.tag_mapping을 사용하여 부분 문자열 매
+        free_text에 포함된 단어를 기반으로 nature / vibe / target (+ season) 을 추출
+        키워드·동의어 부분 문자열 매칭을 keyword_matcher 로 한 번에 처리
         """
-        txt = (text or "").strip().lower()
-        nature, vibe, target = set(), set(), set()
+        return self.keyword_matcher.match(text)
 
 
-        # (선택) 동의어/치환어 사전 - 필요한 것만 추가해
-        synonyms = {
-            "바다": ["해변", "바닷가"],
-            "계곡": ["물놀이"],
-            "사진명소": ["포토스팟", "인생샷"],
-            "조용한": ["한적", "조용"],
-            "힐링": ["치유", "휴식"],
-        }
-
-        def match_any(keyword: str) -> bool:
-            
-            # 기본 키워드 포함 매칭
-            if keyword in txt:
-                return True
-            
-            # 동의어 포함 매칭
-            for syn in synonyms.get(keyword, []):
-                if syn in txt:
-                    return True
-                
-            return False
-
-        for kw in self.tag_mapping.get("nature", []):
-            if match_any(kw):
-                nature.add(kw)
-
-        for kw in self.tag_mapping.get("vibe", []):
-            if match_any(kw):
-                vibe.add(kw)
-
-        for kw in self.tag_mapping.get("target", []):
-            if match_any(kw):
-                target.add(kw)
-
-        return {
-            "nature": list(nature),
-            "vibe": list(vibe),
-            "target": list(target),
-        }
-    
-
     def parse_user_input(self, user_input: Dict) -> Dict:
         """
         지원 입력:
@@ -120,10 +355,11 @@ class GangwonPlaceRecommender:
             vibe   = self._to_cased_tags(extracted.get("vibe", []))
             target = self._to_cased_tags(extracted.get("target", []))
 
-            # 디버그 로그
-            print("[DEBUG PARSE] free_text:", text)
-            print("[DEBUG PARSE] extracted:", extracted)
+            # 디버그 로그 (DEBUG 레벨일 때만 포맷팅)
+            logger.debug("[PARSE] free_text: %s", text)
+            logger.debug("[PARSE] extracted: %s", extracted)
 
+            # season 은 추출만 하고 점수에는 반영하지 않음 (기존 free_text 점수 유지)
             return {
                 "free_text": text,
                 "season": None,
@@ -146,114 +382,352 @@ class GangwonPlaceRecommender:
 
 
     # ---------- 점수 계산 ----------
-    def _calc_similarity(self, query_text: str) -> np.ndarray:
-        """SBERT 768D 코사인 유사도 (쿼리 1 x 768 vs 코퍼스 N x 768)"""
-        if self.place_embeddings is None or self.df is None or len(self.df) == 0:
+    def _check_ready(self):
+        if self._embedding_store is None or self.df is None or len(self.df) == 0:
             raise RuntimeError("Recommender is not initialized with df/embeddings.")
+        if len(self._embedding_store) != len(self.df):
+            raise RuntimeError(
+                f"place embeddings rows ({len(self._embedding_store)}) != df rows ({len(self.df)})"
+            )
 
-        qv = self.embedder.encode([query_text], convert_to_numpy=True)  # (1,768)
-        sim = cosine_similarity(qv, self.place_embeddings)[0]           # (N,)
-        return sim
-
-    def _calc_tag_score_row(self, parsed: Dict, row) -> float:
-       
-        score = 0.0
-
-        # season 비교는 동일
-        if parsed.get("season") and isinstance(row.get("season"), str):
-            if str(row["season"]).strip() == parsed["season"]:
-                score += 0.3
-
-        # 문자열/리스트 모두 대응하는 to_set
-        def to_set(x):
-            if isinstance(x, list):
-                return set([str(i).strip().lower() for i in x if str(i).strip()])
-
-            if isinstance(x, str) and x.strip():
-                try:
-                    parsed = ast.literal_eval(x)  # 문자열 리스트 → 리스트 변환
-                    if isinstance(parsed, list):
-                        return set([str(i).strip().lower() for i in parsed if str(i).strip()])
-                except:
-                    return set([v.strip().lower() for v in x.split(",")])
-
-            return set()
-
-        if parsed.get("nature"):
-            u = set(parsed["nature"])
-            p = to_set(row.get("nature"))   
-            if u and p:
-                inter = len(u & p)
-                union = len(u | p) or 1
-                score += 0.25 * (inter / union)
-
-        if parsed.get("vibe"):
-            u = set(parsed["vibe"])
-            p = to_set(row.get("vibe")) 
-            if u and p:
-                inter = len(u & p)
-                union = len(u | p) or 1
-                score += 0.25 * (inter / union)
-
-        if parsed.get("target"):
-            u = set(parsed["target"])
-            p = to_set(row.get("target"))   
-            if u and p:
-                inter = len(u & p)
-                score += 0.2 * (inter / max(len(u), 1))
-                
-        return score
-
-
-    def _calc_hybrid(self, parsed: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        # similarity
+    def _calc_similarity(self, query_text: str) -> np.ndarray:
+        """SBERT 768D 코사인 유사도 (쿼리 1 x 768 vs 정규화된 코퍼스 N x 768, 축소 모드면 PCA 차원)"""
+        self._check_ready()
+        if self.batcher is not None:
+            return self.batcher(query_text)                             # (B,N) 중 자기 행
+
+        qv = self._project_queries(self._encode_query(query_text))     # (768,)
+        with self.metrics.timer("similarity"):
+            return self._embedding_store.scores(qv)                     # (N,)
+
+    def _calc_similarity_batch(self, query_texts: List[str]) -> np.ndarray:
+        """쿼리 M개 x 코퍼스 N개 코사인 유사도 (encode 한 번 + 행렬곱 한 번)"""
+        self._check_ready()
+
+        qv = self._project_queries(self._encode_queries(query_texts))  # (M,768)
+        with self.metrics.timer("similarity"):
+            return self._embedding_store.scores_batch(qv)               # (M,N)
+
+    def _encode_query(self, query_text: str) -> np.ndarray:
+        """정규화한 쿼리 문장을 임베딩 (캐시 우선, 미스일 때만 SBERT encode)"""
+        return self._encode_queries([query_text])[0]
+
+    def _encode_queries(self, query_texts: List[str]) -> np.ndarray:
+        """여러 쿼리를 임베딩. 캐시 미스인 고유 문장만 모아 SBERT encode 를 한 번 호출"""
+        keys = [QueryEmbeddingCache.normalize_query(t) for t in query_texts]
+        found = {}
+        for key in dict.fromkeys(keys):
+            qv = self.query_cache.get(key)
+            if qv is not None:
+                found[key] = qv
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            with self.metrics.timer("encode"):
+                vecs = self.embedder.encode(missing, convert_to_numpy=True)  # (U,768)
+            for key, qv in zip(missing, vecs):
+                self.query_cache.set(key, qv)
+                found[key] = qv
+
+        return np.stack([found[key] for key in keys])
+
+    def _build_query_text(self, parsed: Dict) -> str:
         if parsed["free_text"]:
-            query_text = parsed["free_text"]
+            return parsed["free_text"]
+
+        # 태그 기반일 때 쿼리 문장 생성 (간단 조합)
+        parts = []
+        if parsed.get("season"):
+            parts.append(parsed["season"])
+        for k in ("target", "nature", "vibe"):
+            if parsed[k]:
+                parts.append(", ".join(parsed[k]))
+        return " ".join(parts) if parts else "여행지 추천"
+
+    def _calc_hybrid(self, parsed: Dict, tag_only: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # similarity (tag_only 면 SBERT encode 생략, 유사도 0)
+        if tag_only:
+            if self.df is None or len(self.df) == 0:
+                raise RuntimeError("Recommender is not initialized with df.")
+            sim = np.zeros(len(self.df), dtype=np.float32)
         else:
-            # 태그 기반일 때 쿼리 문장 생성 (간단 조합)
-            parts = []
-            if parsed.get("season"):
-                parts.append(parsed["season"])
-            for k in ("target", "nature", "vibe"):
-                if parsed[k]:
-                    parts.append(", ".join(parsed[k]))
-            query_text = " ".join(parts) if parts else "여행지 추천"
-
-        sim = self._calc_similarity(query_text)
-
-        # tag scores (0~1로 정규화)
-        tag_scores = np.zeros(len(self.df), dtype=float)
-        for i, (_, row) in enumerate(self.df.iterrows()):
-            tag_scores[i] = self._calc_tag_score_row(parsed, row)
-        if tag_scores.max() > 0:
-            tag_scores = tag_scores / tag_scores.max()
+            query_text = self._build_query_text(parsed)
+            sim = self._calc_similarity(query_text)
+
+        # tag scores (0~1로 정규화) - 미리 만든 태그 인덱스로 전체 행을 한 번에 계산
+        with self.metrics.timer("tag_score"):
+            tag_scores = self.tag_index.score(parsed)
+            if tag_scores.max() > 0:
+                tag_scores = tag_scores / tag_scores.max()
 
         hybrid = self.sim_w * sim + self.tag_w * tag_scores
         
         return hybrid, sim, tag_scores
 
-    # ---------- 최종 추천 ----------
-    def recommend_places(self, user_input: Dict, top_k: int = 3) -> Dict:
-        parsed = self.parse_user_input(user_input)
-        hybrid, sim, tag = self._calc_hybrid(parsed)
+    def _calc_hybrid_batch(self, parsed_list: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """_calc_hybrid 의 배치 버전. 반환 행렬은 모두 (M, N)"""
+        sim = self._calc_similarity_batch([self._build_query_text(p) for p in parsed_list])
+
+        # tag scores - 쿼리별(행별) 최대값으로 0~1 정규화
+        with self.metrics.timer("tag_score"):
+            tag_scores = self.tag_index.score_batch(parsed_list)
+            row_max = tag_scores.max(axis=1, keepdims=True)
+            tag_scores = np.divide(tag_scores, row_max, out=tag_scores, where=row_max > 0)
+
+        hybrid = self.sim_w * sim + self.tag_w * tag_scores
+
+        return hybrid, sim, tag_scores
 
-        idxs = np.argsort(hybrid)[::-1][:top_k]
+    def _use_ann(self) -> bool:
+        """근사 인덱스(ivf/hnsw)로 유사도 후보를 가져오는지"""
+        return self.vector_index is not None and self.vector_index.approximate
+
+    def _use_candidates(self, tag_only: bool = False) -> bool:
+        """
+        후보 집합만 하이브리드 점수를 계산할지
+        - 근사 인덱스: 유사도 후보 풀 (tag_only 는 SBERT 를 안 쓰므로 제외)
+        - retrieval.prefilter: 태그 역색인 후보 ∪ 유사도 상위 후보
+        """
+        if self.prefilter:
+            return True
+        return not tag_only and self._use_ann()
+
+    def _candidate_pool(self, top_k: int, offset: int = 0) -> int:
+        return max(int(self.retrieval_conf.get("candidates", 200)), top_k + offset)
+
+    def _calc_hybrid_candidates(self, parsed: Dict, pool: int, qv: np.ndarray = None,
+                                tag_only: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+        """
+        1단계: 유사도 상위 pool 개 (+ prefilter 면 태그 포스팅 합집합) 후보 행 선택
+        2단계: 후보만 하이브리드 점수 계산
+        반환: (행 번호, hybrid, sim, tag, bound) - 점수 배열은 행 번호 순서와 같은 길이.
+        bound 는 후보 밖 행이 가질 수 있는 hybrid 상한 (sim_w x 유사도 후보 중 최소 유사도).
+        근사 인덱스는 더 유사한 행을 놓칠 수 있어 상한이 성립하지 않으므로 bound=None.
+        prefilter 면 태그 점수가 0 이 아닌 행이 전부 후보라서 정규화 최대값도 전체와 같다.
+        """
+        self._check_ready()
+        n = len(self.df)
+        index = self.vector_index
+        full_sim = None
+        if tag_only:
+            sim_rows = np.empty(0, dtype=np.int64)
+            bound = 0.0
+        else:
+            if index.approximate:
+                if qv is None:
+                    qv = self._project_queries(self._encode_query(self._build_query_text(parsed)))
+                with self.metrics.timer("similarity"):
+                    sim_rows, top_sim = index.search(qv, pool)
+            else:
+                if qv is None:
+                    full_sim = self._calc_similarity(self._build_query_text(parsed))
+                else:
+                    with self.metrics.timer("similarity"):
+                        full_sim = self._embedding_store.scores(qv)
+                sim_rows = select_top_k(full_sim, pool)
+                top_sim = full_sim[sim_rows]
+            if index.approximate:
+                bound = None
+            else:
+                bound = self.sim_w * float(top_sim.min()) if len(sim_rows) < n else -np.inf
+
+        with self.metrics.timer("candidates"):
+            if self.prefilter:
+                rows = np.union1d(sim_rows, self.tag_index.candidate_rows(parsed))
+            else:
+                rows = np.sort(sim_rows)
+
+            if tag_only:
+                sim = np.zeros(len(rows), dtype=np.float32)
+            elif full_sim is not None:
+                sim = full_sim[rows]
+            else:
+                sim = self._embedding_store.scores_rows(qv, rows)
+
+        with self.metrics.timer("tag_score"):
+            tag_scores = self.tag_index.score(parsed, rows=rows)
+            if len(tag_scores) and tag_scores.max() > 0:
+                tag_scores = tag_scores / tag_scores.max()
+
+        hybrid = self.sim_w * sim + self.tag_w * tag_scores
+        return rows, hybrid, sim, tag_scores, bound
+
+    def _candidates_cover(self, hybrid: np.ndarray, bound: float, need: int) -> bool:
+        """
+        recall guard: 후보 중 need 번째 hybrid 가 후보 밖 상한(bound)보다 확실히 크면
+        전체 계산과 같은 top-k 가 보장된다
+        """
+        if bound == -np.inf:
+            return True
+        if len(hybrid) < need:
+            return False
+        kth = np.partition(hybrid, len(hybrid) - need)[len(hybrid) - need]
+        return bool(kth > bound)
+
+    def _recommend_candidates(self, parsed: Dict, top_k: int, offset: int = 0, tag_only: bool = False,
+                              qv: np.ndarray = None) -> Dict:
+        rows, hybrid, sim, tag, bound = self._calc_hybrid_candidates(
+            parsed, self._candidate_pool(top_k, offset), qv=qv, tag_only=tag_only)
+        self.retrieval_stats["candidate_queries"] += 1
+        self.retrieval_stats["candidates_scored"] += len(rows)
+        # guard 는 exact 인덱스 + prefilter 일 때만 적용 (근사 인덱스는 bound=None → 후보 결과를 그대로 사용,
+        # prefilter 없이 근사 인덱스만 쓰면 후보 밖 행의 태그 점수를 알 수 없음)
+        if self.prefilter and self.recall_guard and bound is not None \
+                and not self._candidates_cover(hybrid, bound, top_k + offset):
+            # 후보만으로는 top-k 를 보장할 수 없음 → 전체 행 계산
+            self.retrieval_stats["fallbacks"] += 1
+            hybrid, sim, tag = self._calc_hybrid(parsed, tag_only=tag_only)
+            return self._build_result(parsed, hybrid, sim, tag, top_k, offset)
+        return self._build_result(parsed, hybrid, sim, tag, top_k, offset, rows=rows)
+
+    # ---------- 결과 캐시 ----------
+    def _result_cache_key(self, parsed: Dict, top_k: int, offset: int = 0, tag_only: bool = False) -> str:
+        """
+        parse 결과의 정규형 해시.
+        태그 점수는 집합 기준이라 태그 리스트는 정렬하고, 유사도 쿼리 문장은 태그 순서에
+        따라 달라지므로 실제 쿼리 문장을 함께 넣는다.
+        """
+        canon = {
+            "free_text": parsed.get("free_text"),
+            "season": parsed.get("season"),
+            "nature": sorted(parsed.get("nature") or []),
+            "vibe": sorted(parsed.get("vibe") or []),
+            "target": sorted(parsed.get("target") or []),
+            "query_text": self._build_query_text(parsed),
+            "top_k": top_k,
+            "offset": offset,
+            "tag_only": tag_only,
+            "stamp": self.cache_stamp,
+        }
+        raw = json.dumps(canon, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # ---------- 최종 추천 ----------
+    def recommend_places(self, user_input: Dict, top_k: int = 3, offset: int = 0,
+                         tag_only: bool = False, profile: np.ndarray = None) -> Dict:
+        """
+        상위 top_k 추천. offset 을 주면 그 순위부터 top_k 개 (페이지네이션).
+        tag_only=True 면 SBERT 를 쓰지 않고 태그 점수만으로 순위를 매긴다.
+        profile(사용자 프로필 벡터)을 주면 개인화 점수를 섞고, 사용자마다 결과가 달라서 결과 캐시는 쓰지 않는다.
+        """
+        with self.metrics.timer("parse"):
+            parsed = self.parse_user_input(user_input)
+
+        if profile is not None and self.personalization_enabled:
+            # 프로필 유사도는 전체 행 기준이라 후보 검색(prefilter/근사 인덱스) 대신 전체 계산
+            hybrid, sim, tag = self._calc_hybrid(parsed, tag_only=tag_only)
+            hybrid, personal = self._personalize(hybrid, profile)
+            result = self._build_result(parsed, hybrid, sim, tag, top_k, offset, personal=personal)
+            return dict(result, cache_hit=False)
+
+        key = self._result_cache_key(parsed, top_k, offset, tag_only)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return dict(copy.deepcopy(cached), cache_hit=True)
+
+        result = self._recommend_parsed(parsed, top_k, offset, tag_only)
+        self.result_cache.set(key, copy.deepcopy(result))
+        return dict(result, cache_hit=False)
+
+    def recommend_places_batch(self, user_inputs: List[Dict], top_k: int = 3, offset: int = 0,
+                               profile: np.ndarray = None, tag_only: List[bool] = None) -> List[Dict]:
+        """
+        여러 입력을 한 번에 추천. 결과 캐시에 없는 입력만 모아
+        SBERT encode 1회 + (M x N) 유사도/태그 점수 행렬로 계산한다.
+        tag_only: 입력별 tag_only 여부 (True 인 입력은 encode 배치에서 빼고 태그 점수만 사용).
+        각 결과는 recommend_places() 와 같은 형태 (profile 도 동일하게 적용, 캐시 미사용).
+        """
+        with self.metrics.timer("parse"):
+            parsed_list = [self.parse_user_input(x) for x in user_inputs]
+        tag_only = [bool(t) for t in tag_only] if tag_only is not None else [False] * len(parsed_list)
+
+        if profile is not None and self.personalization_enabled:
+            results: List[Dict] = [None] * len(parsed_list)
+            encode_rows = [i for i, t in enumerate(tag_only) if not t]
+            if encode_rows:
+                hybrid, sim, tag = self._calc_hybrid_batch([parsed_list[i] for i in encode_rows])
+                hybrid, personal = self._personalize(hybrid, profile)
+                for row, i in enumerate(encode_rows):
+                    results[i] = self._build_result(parsed_list[i], hybrid[row], sim[row], tag[row],
+                                                    top_k, offset, personal=personal)
+            for i in (i for i, t in enumerate(tag_only) if t):
+                hybrid, sim, tag = self._calc_hybrid(parsed_list[i], tag_only=True)
+                hybrid, personal = self._personalize(hybrid, profile)
+                results[i] = self._build_result(parsed_list[i], hybrid, sim, tag, top_k, offset, personal=personal)
+            return [dict(r, cache_hit=False) for r in results]
+        keys = [self._result_cache_key(p, top_k, offset, t) for p, t in zip(parsed_list, tag_only)]
+
+        results: List[Dict] = [None] * len(parsed_list)
+        pending: Dict[str, List[int]] = {}  # 같은 입력이 여러 번 오면 한 번만 계산
+        for i, key in enumerate(keys):
+            cached = self.result_cache.get(key) if key not in pending else None
+            if cached is not None:
+                results[i] = dict(copy.deepcopy(cached), cache_hit=True)
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            built: Dict[str, Dict] = {}
+            # tag_only 입력은 SBERT 를 쓰지 않으므로 encode 배치에서 빼고 단건과 같은 경로로 계산
+            encode_keys = []
+            for key, idxs in pending.items():
+                if tag_only[idxs[0]]:
+                    built[key] = self._recommend_parsed(parsed_list[idxs[0]], top_k, offset, tag_only=True)
+                else:
+                    encode_keys.append(key)
+            todo = [parsed_list[pending[key][0]] for key in encode_keys]
+            if todo and self._use_ann():
+                # encode 는 한 번에, 후보 검색/재정렬은 쿼리별로
+                self._check_ready()
+                qvs = self._project_queries(self._encode_queries([self._build_query_text(p) for p in todo]))
+                for key, p, qv in zip(encode_keys, todo, qvs):
+                    built[key] = self._recommend_candidates(p, top_k, offset, qv=qv)
+            elif todo:
+                hybrid, sim, tag = self._calc_hybrid_batch(todo)
+                for row, (key, p) in enumerate(zip(encode_keys, todo)):
+                    built[key] = self._build_result(p, hybrid[row], sim[row], tag[row], top_k, offset)
+            for key, idxs in pending.items():
+                result = built[key]
+                self.result_cache.set(key, copy.deepcopy(result))
+                for i in idxs:
+                    results[i] = dict(copy.deepcopy(result), cache_hit=False)
+
+        return results
+
+    def _personalize(self, hybrid: np.ndarray, profile: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """프로필 유사도 (N,) 를 섞은 하이브리드 점수. hybrid 는 (N,) 또는 (M, N)"""
+        with self.metrics.timer("personalize"):
+            personal = self._embedding_store.scores(profile)
+            return (1.0 - self.personal_w) * hybrid + self.personal_w * personal, personal
+
+    def _recommend_parsed(self, parsed: Dict, top_k: int, offset: int = 0, tag_only: bool = False) -> Dict:
+        if self._use_candidates(tag_only):
+            return self._recommend_candidates(parsed, top_k, offset, tag_only=tag_only)
+        hybrid, sim, tag = self._calc_hybrid(parsed, tag_only=tag_only)
+        return self._build_result(parsed, hybrid, sim, tag, top_k, offset)
+
+    def _build_result(self, parsed: Dict, hybrid: np.ndarray, sim: np.ndarray,
+                      tag: np.ndarray, top_k: int, offset: int = 0, rows: np.ndarray = None,
+                      personal: np.ndarray = None) -> Dict:
+        """rows 가 있으면 점수 배열은 후보 행(rows) 기준, personal 은 프로필 유사도 (전체 행 기준)"""
+        tie_keys = self._tie_keys
+        if rows is not None and tie_keys is not None:
+            tie_keys = tie_keys[rows]
+        with self.metrics.timer("topk"):
+            idxs = select_top_k(hybrid, top_k, offset=offset, tie_keys=tie_keys)
+        records = self._get_row_records()
         recs = []
         for i in idxs:
-            row = self.df.iloc[i]
-            # travel_id 꼭 포함!
-            recs.append({
-                "travel_id": int(row["travel_id"]),
-                "name": row.get("name"),
-                "season": row.get("season"),
-                "nature": row.get("nature_list", []),
-                "vibe": row.get("vibe_list", []),
-                "target": row.get("target_list", []),
-                "description": row.get("short_description"),
-                "hybrid_score": float(hybrid[i]),
-                "similarity_score": float(sim[i]),
-                "tag_score": float(tag[i]),
-            })
+            rec = dict(records[i if rows is None else rows[i]])
+            for k in ("nature", "vibe", "target"):
+                if isinstance(rec[k], list):
+                    rec[k] = list(rec[k])
+            rec["hybrid_score"] = float(hybrid[i])
+            rec["similarity_score"] = float(sim[i])
+            rec["tag_score"] = float(tag[i])
+            if personal is not None:
+                rec["personal_score"] = float(personal[i])
+            recs.append(rec)
 
         return {
             "parsed_input": parsed,
@@ -0,0 +1,237 @@
+import ast
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 태그 점수 가중치 (season 일치 / nature·vibe 자카드 / target 겹침 비율)
+SEASON_WEIGHT = 0.3
+NATURE_WEIGHT = 0.25
+VIBE_WEIGHT = 0.25
+TARGET_WEIGHT = 0.2
+
+TAG_CATEGORIES = ("nature", "vibe", "target")
+
+
+def to_tag_set(x) -> set:
+    """DF 셀(문자열/리스트)을 소문자 태그 집합으로 변환"""
+    if isinstance(x, list):
+        return set([str(i).strip().lower() for i in x if str(i).strip()])
+
+    if isinstance(x, str) and x.strip():
+        try:
+            parsed = ast.literal_eval(x)  # 문자열 리스트 → 리스트 변환
+            if isinstance(parsed, list):
+                return set([str(i).strip().lower() for i in parsed if str(i).strip()])
+        except:
+            return set([v.strip().lower() for v in x.split(",")])
+
+    return set()
+
+
+class TagIndex:
+    """
+    CSV 로딩 시 한 번만 만드는 태그 인덱스.
+    - season: 행별 season 코드 (문자열이 아니면 -1)
+    - nature/vibe/target: 행 x 태그 multi-hot 행렬(uint8) + 행별 태그 개수
+    요청마다 문자열을 다시 파싱하지 않고 행렬 연산으로 전체 N개 점수를 계산한다.
+    - postings: 태그(season 포함) → 해당 태그를 가진 행 번호 (역색인, 처음 사용할 때 생성)
+    """
+
+    def __init__(self, season_codes: np.ndarray, season_vocab: Dict[str, int],
+                 vocabs: Dict[str, Dict[str, int]], matrices: Dict[str, np.ndarray]):
+        self.season_codes = season_codes
+        self.season_vocab = season_vocab
+        self.vocabs = vocabs
+        self.matrices = matrices
+        self.sizes = {k: m.sum(axis=1, dtype=np.int64) for k, m in matrices.items()}
+        self._float_matrices: Dict[str, np.ndarray] = {}
+        self._postings: Optional[Dict[str, List[np.ndarray]]] = None
+        self._labels: Optional[Dict[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.season_codes)
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "TagIndex":
+        n = len(df)
+
+        # season: strip 한 문자열 → 코드
+        season_vocab: Dict[str, int] = {}
+        season_codes = np.full(n, -1, dtype=np.int32)
+        seasons = df["season"].tolist() if "season" in df.columns else [None] * n
+        for i, s in enumerate(seasons):
+            if isinstance(s, str):
+                season_codes[i] = season_vocab.setdefault(str(s).strip(), len(season_vocab))
+
+        vocabs, matrices = {}, {}
+        for cat in TAG_CATEGORIES:
+            values = df[cat].tolist() if cat in df.columns else [None] * n
+            row_sets = [to_tag_set(v) for v in values]
+
+            vocab: Dict[str, int] = {}
+            for tags in row_sets:
+                for t in sorted(tags):
+                    vocab.setdefault(t, len(vocab))
+
+            mat = np.zeros((n, len(vocab)), dtype=np.uint8)
+            for i, tags in enumerate(row_sets):
+                for t in tags:
+                    mat[i, vocab[t]] = 1
+
+            vocabs[cat] = vocab
+            matrices[cat] = mat
+
+        return cls(season_codes, season_vocab, vocabs, matrices)
+
+    def row_tags(self, row: int) -> List[str]:
+        """행의 season + nature/vibe/target 태그 (사용자 프로필 태그 집계용)"""
+        if self._labels is None:
+            labels = {"season": sorted(self.season_vocab, key=self.season_vocab.get)}
+            for cat in TAG_CATEGORIES:
+                labels[cat] = sorted(self.vocabs[cat], key=self.vocabs[cat].get)
+            self._labels = labels
+        tags = set()
+        code = int(self.season_codes[row])
+        if code >= 0:
+            tags.add(self._labels["season"][code])
+        for cat in TAG_CATEGORIES:
+            tags.update(self._labels[cat][j] for j in np.flatnonzero(self.matrices[cat][row]))
+        return sorted(tags)
+
+    # ---------- 역색인 ----------
+    @staticmethod
+    def _group_rows(codes: np.ndarray, rows: np.ndarray, n_codes: int) -> List[np.ndarray]:
+        """codes[i] 별로 rows[i] 를 모은 리스트 (각 리스트는 행 번호 오름차순)"""
+        order = np.lexsort((rows, codes))
+        bounds = np.searchsorted(codes[order], np.arange(n_codes + 1))
+        sorted_rows = rows[order].astype(np.int64)
+        return [sorted_rows[bounds[i]:bounds[i + 1]] for i in range(n_codes)]
+
+    @property
+    def postings(self) -> Dict[str, List[np.ndarray]]:
+        """{"season": [코드별 행 번호], "nature"/"vibe"/"target": [어휘 인덱스별 행 번호]}"""
+        if self._postings is None:
+            codes = np.asarray(self.season_codes)
+            valid = np.flatnonzero(codes >= 0)
+            postings = {"season": self._group_rows(codes[valid], valid, len(self.season_vocab))}
+            for cat in TAG_CATEGORIES:
+                rows, cols = np.nonzero(self.matrices[cat])
+                postings[cat] = self._group_rows(cols, rows, len(self.vocabs[cat]))
+            self._postings = postings
+        return self._postings
+
+    def candidate_rows(self, parsed: Dict) -> np.ndarray:
+        """
+        태그 점수가 0 보다 큰 행 = 쿼리의 season/태그 포스팅 리스트 합집합 (정렬된 행 번호).
+        여기에 없는 행의 score() 는 정확히 0 이다.
+        """
+        postings = self.postings
+        lists = []
+        season = parsed.get("season")
+        if season and isinstance(season, str) and season in self.season_vocab:
+            lists.append(postings["season"][self.season_vocab[season]])
+        for cat in TAG_CATEGORIES:
+            for t in set(parsed.get(cat) or []):
+                if t in self.vocabs[cat]:
+                    lists.append(postings[cat][self.vocabs[cat][t]])
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(lists))
+
+    # ---------- 점수 계산 ----------
+    def _overlap(self, cat: str, query: set, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """행별 |query ∩ row_tags| (쿼리 태그 중 어휘에 없는 것은 교집합에 기여하지 않음)"""
+        n = len(self) if rows is None else len(rows)
+        cols = [self.vocabs[cat][t] for t in query if t in self.vocabs[cat]]
+        if not cols:
+            return np.zeros(n, dtype=np.int64)
+        mat = self.matrices[cat] if rows is None else self.matrices[cat][rows]
+        return mat[:, cols].sum(axis=1, dtype=np.int64)
+
+    def _jaccard(self, cat: str, query: set, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        inter = self._overlap(cat, query, rows)
+        sizes = self.sizes[cat] if rows is None else self.sizes[cat][rows]
+        union = len(query) + sizes - inter
+        # 행 태그가 비어 있으면 0점 (기존 `if u and p` 조건)
+        return np.where(sizes > 0, inter / np.maximum(union, 1), 0.0)
+
+    def score(self, parsed: Dict, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        parsed 입력에 대한 태그 점수 (정규화 전, 위 *_WEIGHT 상수의 가중합).
+        rows 를 주면 그 행들만 계산 (후보 재정렬용, 반환 길이 len(rows))
+        """
+        n = len(self) if rows is None else len(rows)
+        scores = np.zeros(n, dtype=float)
+
+        season = parsed.get("season")
+        if season and isinstance(season, str):
+            code = self.season_vocab.get(season)
+            if code is not None:
+                codes = self.season_codes if rows is None else self.season_codes[rows]
+                scores += SEASON_WEIGHT * (codes == code)
+
+        if parsed.get("nature"):
+            u = set(parsed["nature"])
+            scores += NATURE_WEIGHT * self._jaccard("nature", u, rows)
+
+        if parsed.get("vibe"):
+            u = set(parsed["vibe"])
+            scores += VIBE_WEIGHT * self._jaccard("vibe", u, rows)
+
+        if parsed.get("target"):
+            u = set(parsed["target"])
+            inter = self._overlap("target", u, rows)
+            sizes = self.sizes["target"] if rows is None else self.sizes["target"][rows]
+            ratio = np.where(sizes > 0, inter / max(len(u), 1), 0.0)
+            scores += TARGET_WEIGHT * ratio
+
+        return scores
+
+    # ---------- 배치 점수 계산 (M개 쿼리 x N개 행) ----------
+    def _float_matrix(self, cat: str) -> np.ndarray:
+        """배치 matmul 용 float64 행렬 (처음 사용할 때 한 번만 변환)"""
+        if cat not in self._float_matrices:
+            self._float_matrices[cat] = self.matrices[cat].astype(np.float64)
+        return self._float_matrices[cat]
+
+    def _query_matrix(self, cat: str, queries: List[set]) -> np.ndarray:
+        vocab = self.vocabs[cat]
+        q = np.zeros((len(queries), len(vocab)), dtype=np.float64)
+        for i, u in enumerate(queries):
+            for t in u:
+                if t in vocab:
+                    q[i, vocab[t]] = 1.0
+        return q
+
+    def score_batch(self, parsed_list: List[Dict]) -> np.ndarray:
+        """parsed 입력 M개에 대한 (M, N) 태그 점수 행렬. 각 행은 score() 결과와 동일"""
+        m = len(parsed_list)
+        scores = np.zeros((m, len(self)), dtype=float)
+
+        codes = np.full(m, -1, dtype=np.int64)
+        for i, parsed in enumerate(parsed_list):
+            season = parsed.get("season")
+            if season and isinstance(season, str):
+                codes[i] = self.season_vocab.get(season, -1)
+        season_match = (self.season_codes[None, :] == codes[:, None]) & (codes[:, None] >= 0)
+        scores += SEASON_WEIGHT * season_match
+
+        for cat, weight in (("nature", NATURE_WEIGHT), ("vibe", VIBE_WEIGHT), ("target", TARGET_WEIGHT)):
+            queries = [set(p[cat]) if p.get(cat) else set() for p in parsed_list]
+            qsizes = np.array([len(u) for u in queries], dtype=np.int64)
+            if not qsizes.any():
+                continue
+
+            inter = self._query_matrix(cat, queries) @ self._float_matrix(cat).T  # (M, N)
+            sizes = self.sizes[cat][None, :]
+            active = (qsizes[:, None] > 0) & (sizes > 0)
+            if cat == "target":
+                ratio = inter / np.maximum(qsizes, 1)[:, None]
+            else:
+                union = qsizes[:, None] + sizes - inter
+                ratio = inter / np.maximum(union, 1)
+            scores += weight * np.where(active, ratio, 0.0)
+
+        return scores
@@ -0,0 +1,33 @@
+from typing import Optional
+
+import numpy as np
+
+
+def select_top_k(scores: np.ndarray, k: int, offset: int = 0,
+                 tie_keys: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    점수 내림차순 상위 [offset, offset + k) 구간의 인덱스 반환 (페이지네이션용 offset 지원).
+    - 전체 정렬 대신 np.argpartition 으로 후보만 고른 뒤 후보끼리만 정렬
+    - 동점은 tie_keys(예: travel_id) 오름차순으로 결정 → 항상 같은 순서
+    - NaN 점수는 가장 낮은 점수로 취급
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    offset = max(int(offset), 0)
+    end = min(offset + int(k), n)
+    if k <= 0 or offset >= n:
+        return np.empty(0, dtype=np.intp)
+
+    s = np.where(np.isnan(scores), -np.inf, scores)
+    keys = np.arange(n) if tie_keys is None else np.asarray(tie_keys)
+
+    if end < n:
+        # end 번째로 큰 점수 이상인 행은 모두 후보 (경계의 동점까지 포함해야 결과가 결정적)
+        part = np.argpartition(-s, end - 1)[:end]
+        threshold = s[part].min()
+        cand = np.flatnonzero(s >= threshold)
+    else:
+        cand = np.arange(n)
+
+    order = np.lexsort((keys[cand], -s[cand]))
+    return cand[order][offset:end]
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class UserProfile:
+    """
+    사용자 선호 프로필 (별점/북마크로 점진 갱신).
+    - vec_sum: 평가한 장소 임베딩 행(L2 정규화된 place_embeddings)의 가중 합 (float32, d)
+    - weight: 가중치 합 → 평균 벡터 = vec_sum / weight
+    - tag_counts: 장소 태그(season/nature/vibe/target)의 가중 개수
+    - ratings: travel_id → 반영된 별점, bookmarks: 반영된 북마크 travel_id
+    가중치는 장소마다 별점(0~5) + 북마크 bookmark_weight 를 더한 값이라,
+    별점 수정/북마크 토글은 이전 기여분과의 차이만 더하면 된다 (장소 1개당 O(d), 이력 재계산 없음).
+    """
+
+    def __init__(self, dim: int, bookmark_weight: float = 1.0):
+        self.dim = int(dim)
+        self.bookmark_weight = float(bookmark_weight)
+        self.vec_sum = np.zeros(self.dim, dtype=np.float32)
+        self.weight = 0.0
+        self.tag_counts: Dict[str, float] = {}
+        self.ratings: Dict[int, float] = {}
+        self.bookmarks = set()
+
+    # ---------- 점진 갱신 ----------
+    def _add(self, vector: np.ndarray, tags: Iterable[str], delta: float):
+        if delta == 0:
+            return
+        self.vec_sum += np.float32(delta) * np.asarray(vector, dtype=np.float32)
+        self.weight += delta
+        for t in tags:
+            count = self.tag_counts.get(t, 0.0) + delta
+            if abs(count) < 1e-9:
+                self.tag_counts.pop(t, None)
+            else:
+                self.tag_counts[t] = count
+
+    def apply_rating(self, travel_id: int, score: float, vector: np.ndarray, tags: Iterable[str]):
+        """별점 등록/수정: 이전 별점과의 차이만큼 반영"""
+        old = self.ratings.get(travel_id, 0.0)
+        self.ratings[travel_id] = float(score)
+        self._add(vector, tags, float(score) - old)
+
+    def apply_bookmark(self, travel_id: int, added: bool, vector: np.ndarray, tags: Iterable[str]):
+        """북마크 추가/해제 (이미 같은 상태면 변화 없음)"""
+        if added == (travel_id in self.bookmarks):
+            return
+        if added:
+            self.bookmarks.add(travel_id)
+        else:
+            self.bookmarks.discard(travel_id)
+        self._add(vector, tags, self.bookmark_weight if added else -self.bookmark_weight)
+
+    # ---------- 조회 ----------
+    def mean_vector(self, min_weight: float = 0.0) -> Optional[np.ndarray]:
+        """가중 평균 벡터 (L2 정규화). 가중치 합이 min_weight 이하이면 None"""
+        if self.weight <= max(min_weight, 0.0):
+            return None
+        norm = float(np.linalg.norm(self.vec_sum))
+        if norm == 0.0:
+            return None
+        return (self.vec_sum / norm).astype(np.float32)
+
+    def top_tags(self, n: int = 5) -> List[str]:
+        return [t for t, c in sorted(self.tag_counts.items(), key=lambda x: (-x[1], x[0]))[:n] if c > 0]
+
+    # ---------- 저장 형식 ----------
+    def to_doc(self) -> Dict:
+        """MongoDB 문서 필드 (벡터는 float32 bytes 로 압축 저장)"""
+        return {
+            "dim": self.dim,
+            "vec": self.vec_sum.astype("<f4").tobytes(),
+            "weight": self.weight,
+            "tag_counts": self.tag_counts,
+            "ratings": {str(k): v for k, v in self.ratings.items()},
+            "bookmarks": sorted(self.bookmarks),
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Optional[Dict], dim: int, bookmark_weight: float = 1.0) -> "UserProfile":
+        """저장된 문서 → 프로필 (문서가 없거나 차원이 다르면 빈 프로필)"""
+        profile = cls(dim, bookmark_weight)
+        if not doc or int(doc.get("dim", -1)) != profile.dim or not doc.get("vec"):
+            return profile
+        profile.vec_sum = np.frombuffer(bytes(doc["vec"]), dtype="<f4").astype(np.float32)
+        profile.weight = float(doc.get("weight", 0.0))
+        profile.tag_counts = dict(doc.get("tag_counts") or {})
+        profile.ratings = {int(k): float(v) for k, v in (doc.get("ratings") or {}).items()}
+        profile.bookmarks = set(int(t) for t in doc.get("bookmarks") or [])
+        return profile
+
+    @staticmethod
+    def vector_from_doc(doc: Optional[Dict], dim: int, min_weight: float = 0.0) -> Optional[np.ndarray]:
+        """추천용: vec/weight 만 읽어 정규화된 평균 벡터 (차원이 다르면 None)"""
+        if not doc or int(doc.get("dim", -1)) != int(dim) or not doc.get("vec"):
+            return None
+        if float(doc.get("weight", 0.0)) <= max(min_weight, 0.0):
+            return None
+        vec = np.frombuffer(bytes(doc["vec"]), dtype="<f4")
+        norm = float(np.linalg.norm(vec))
+        return (vec / norm).astype(np.float32) if norm > 0 else None
@@ -0,0 +1,166 @@
+"""
+유사도 후보 검색 인덱스 (retrieval.index)
+
+- exact : 전체 코퍼스 행렬곱 (기존 동작, 근사 없음)
+- ivf   : numpy 로 구현한 IVF (spherical k-means 로 리스트를 나누고 n_probe 개 리스트만 스캔)
+- hnsw  : hnswlib (설치되어 있을 때만)
+
+근사 인덱스는 유사도 상위 후보 풀만 돌려주고, 추천기가 그 후보만 하이브리드 점수로 재정렬한다.
+후보 유사도는 EmbeddingStore.scores_rows 로 후보 행만 다시 계산한다 (전체 행렬곱과 float32 오차 수준만 다름).
+"""
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+
+from project_root1.embedding_store import EmbeddingStore
+from project_root1.topk import select_top_k
+
+
+class ExactIndex:
+    """전체 스캔 (기준 구현)"""
+
+    name = "exact"
+    approximate = False
+
+    def __init__(self, store: EmbeddingStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """쿼리 (d,) → 유사도 상위 k 개 (행 번호, 유사도)"""
+        sim = self.store.scores(query)
+        rows = select_top_k(sim, k)
+        return rows, sim[rows]
+
+
+class IVFIndex:
+    """
+    Inverted File 인덱스.
+    정규화된 코퍼스를 n_lists 개 클러스터로 나눠 두고, 쿼리와 가까운 n_probe 개 클러스터의
+    행만 스캔한다 (후보가 k 개보다 적으면 다음 클러스터까지 넓힌다).
+    """
+
+    name = "ivf"
+    approximate = True
+
+    def __init__(self, store: EmbeddingStore, n_lists: int = None, n_probe: int = 8,
+                 n_iter: int = 10, train_size: int = 20000, seed: int = 42):
+        self.store = store
+        n = len(store)
+        self.n_lists = max(1, min(int(n_lists or round(math.sqrt(n))), n))
+        self.n_probe = max(1, min(int(n_probe), self.n_lists))
+
+        rng = np.random.default_rng(seed)
+        sample = store.vectors
+        if n > train_size:
+            sample = store.vectors[np.sort(rng.choice(n, size=train_size, replace=False))]
+        self.centroids = self._train(sample, self.n_lists, n_iter, rng)
+
+        assign = self._assign(store.vectors, self.centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.n_lists)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.list_rows = order.astype(np.int64)   # 리스트 순서로 정렬한 행 번호
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @staticmethod
+    def _assign(x: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(len(x), dtype=np.int64)
+        for start in range(0, len(x), chunk):
+            out[start:start + chunk] = np.argmax(x[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    @classmethod
+    def _train(cls, x: np.ndarray, k: int, n_iter: int, rng) -> np.ndarray:
+        """spherical k-means (코사인 기준, 빈 클러스터는 임의 점으로 다시 시작)"""
+        centroids = np.array(x[rng.choice(len(x), size=k, replace=False)], dtype=np.float32)
+        for _ in range(n_iter):
+            assign = cls._assign(x, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, x)
+            empty = np.bincount(assign, minlength=k) == 0
+            if empty.any():
+                sums[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+            centroids = EmbeddingStore.normalize(sums)
+        return centroids
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(query).reshape(-1)
+        self.store.check_dim(query.shape[0])
+        q = EmbeddingStore.normalize(query)
+        probe_order = np.argsort(-(self.centroids @ q), kind="stable")
+
+        lists, total = [], 0
+        for li in probe_order:
+            size = self.offsets[li + 1] - self.offsets[li]
+            if size == 0:
+                continue
+            lists.append(self.list_rows[self.offsets[li]:self.offsets[li + 1]])
+            total += size
+            if len(lists) >= self.n_probe and total >= k:
+                break
+
+        rows = np.sort(np.concatenate(lists))
+        sim = self.store.scores_rows(query, rows)
+        top = select_top_k(sim, k)
+        return rows[top], sim[top]
+
+
+class HNSWIndex:
+    """hnswlib 래퍼 (inner product = 정규화된 코퍼스의 코사인)"""
+
+    name = "hnsw"
+    approximate = True
+
+    def __init__(self, store: EmbeddingStore, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = 128, seed: int = 42):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("retrieval.index=hnsw requires `pip install hnswlib`") from e
+
+        self.store = store
+        self.ef_search = int(ef_search)
+        self.index = hnswlib.Index(space="ip", dim=store.dim)
+        self.index.init_index(max_elements=len(store), ef_construction=int(ef_construction),
+                              M=int(m), random_seed=seed)
+        self.index.add_items(store.vectors, np.arange(len(store)))
+        self.index.set_ef(self.ef_search)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(query).reshape(-1)
+        self.store.check_dim(query.shape[0])
+        q = EmbeddingStore.normalize(query)
+        k = min(k, len(self))
+        if self.ef_search < k:
+            self.index.set_ef(k)
+        labels, _ = self.index.knn_query(q[None, :], k=k)
+        if self.ef_search < k:
+            self.index.set_ef(self.ef_search)
+
+        rows = np.sort(labels[0].astype(np.int64))
+        sim = self.store.scores_rows(query, rows)
+        top = select_top_k(sim, k)
+        return rows[top], sim[top]
+
+
+INDEX_TYPES = {"exact": ExactIndex, "ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+def build_vector_index(store: EmbeddingStore, retrieval_conf: Dict):
+    """config.yaml 의 retrieval 설정으로 인덱스 생성"""
+    kind = (retrieval_conf or {}).get("index", "exact")
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"unknown retrieval.index: {kind}")
+    if kind == "exact":
+        return ExactIndex(store)
+    params = dict((retrieval_conf or {}).get(kind) or {})
+    return INDEX_TYPES[kind](store, **params)
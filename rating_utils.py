@@ -0,0 +1,108 @@
+from extensions import mongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+import datetime
+
+
+# 별점 입력 검증 (단건 /rating, 일괄 /ratings/bulk 공통)
+
+def parse_rating_item(data):
+    """요청 항목 → (travel_id, score, feedback_tags). 잘못된 입력이면 ValueError(응답 메시지)"""
+    travel_id = data.get('travel_id')  # 별점 남긴 여행지id
+    score = data.get('score')
+
+    # 심화: 피드백 기능
+    feedback_tags = data.get('feedback_tags', [])
+    if not isinstance(feedback_tags, list):
+        feedback_tags = [feedback_tags]
+
+    # 필수 데이터 체크
+    if not all([travel_id, score]):
+        raise ValueError("travel_id와 score는 필수입니다.")
+
+    # score 숫자/범위 체크
+    try:
+        score_f = float(score)
+    except (TypeError, ValueError):
+        raise ValueError("별점은 숫자여야 합니다.")
+
+    if not (0.0 <= score_f <= 5.0):
+        raise ValueError("별점은 0~5 사이여야 합니다.")
+
+    # travel_id 정수 변환
+    try:
+        travel_id_int = int(travel_id)
+    except (TypeError, ValueError):
+        raise ValueError("travel_id는 정수여야 합니다.")
+
+    return travel_id_int, score_f, feedback_tags
+
+
+# 별점 + 자동 북마크 쓰기
+#
+# 별점 upsert 와 북마크 upsert($setOnInsert 라 이미 있으면 변경 없음 → 멱등)를
+# 컬렉션마다 bulk_write 한 번으로 보낸다. 별점이 몇 개든 DB 왕복은 2번
+# (기존: 별점마다 bookmarks.find_one + insert_one + ratings.update_one 최대 3번).
+# 조회 조건 (user_id, travel_id) 은 db_indexes 의 unique 인덱스를 탄다.
+#
+# updated_at 을 호출자가 준 항목(과거 별점 가져오기)은 저장된 별점이 그보다 오래됐을 때만 덮어쓴다.
+# 필터에 updated_at < 주어진 시각을 넣고 upsert 하므로, 더 최근 별점이 있으면 필터가 안 맞아
+# insert 를 시도하다 unique 인덱스(user_travel_unique)에 걸린다 (DuplicateKey 11000) → 그 항목은 건너뜀(stale).
+
+def write_ratings(user_oid, items, now=None):
+    """
+    items: [(travel_id, score, feedback_tags, updated_at 또는 None)]
+    같은 travel_id 가 여러 번 있으면 마지막 값만 쓴다.
+    반환: (ratings BulkWriteResult, 이번에 새로 생긴 자동 북마크 travel_id 목록,
+           저장된 별점이 더 최근이라 건너뛴 travel_id 목록)
+    """
+    now = now or datetime.datetime.utcnow()
+    latest = {}
+    for travel_id, score, feedback_tags, updated_at in items:
+        latest[travel_id] = (score, feedback_tags, updated_at)
+
+    rating_ops = []
+    bookmark_ops = []
+    for travel_id, (score, feedback_tags, given_at) in latest.items():
+        key = {"user_id": user_oid, "travel_id": travel_id}
+        updated_at = given_at or now
+        if given_at is not None:
+            # updated_at 이 없는 예전 별점(null)도 덮어쓸 수 있게 포함
+            rating_filter = dict(key, **{"$or": [{"updated_at": {"$lt": given_at}}, {"updated_at": None}]})
+        else:
+            rating_filter = key
+        rating_ops.append(UpdateOne(
+            rating_filter,
+            {
+                "$set": {
+                    "score": score,
+                    "feedback_tags": feedback_tags,
+                    "updated_at": updated_at
+                },
+                "$setOnInsert": {"created_at": updated_at}
+            },
+            upsert=True
+        ))
+        bookmark_ops.append(UpdateOne(
+            key,
+            {"$setOnInsert": {"tags": [], "created_at": updated_at}},  # 초기 태그 없음
+            upsert=True
+        ))
+
+    if not rating_ops:
+        return None, [], []
+    travel_ids = list(latest)
+    bookmark_result = mongo.db.bookmarks.bulk_write(bookmark_ops, ordered=False)
+    new_bookmarks = [travel_ids[i] for i in sorted(bookmark_result.upserted_ids)]
+
+    stale = []
+    try:
+        result = mongo.db.ratings.bulk_write(rating_ops, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            if err.get("code") != 11000 or latest[travel_ids[err["index"]]][2] is None:
+                raise
+            stale.append(travel_ids[err["index"]])
+        result = BulkWriteResult(e.details, True)
+    return result, new_bookmarks, stale
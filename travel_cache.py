@@ -0,0 +1,209 @@
+from extensions import mongo
+from fast_json import open_object
+from urllib.parse import quote
+import os
+import threading
+import time
+
+
+# 여행지 메타 캐시 (travels 컬렉션 → 프로세스 메모리)
+#
+# travels 는 사실상 정적인 참조 데이터라 부팅 시 한 번에 읽어 두고,
+# /recommend, /mypage, /mypage/bookmarks 의 메타 조인을 DB 왕복 없이 dict 조회로 처리한다.
+# 항목마다 정규화된 image_urls 리스트, lat/lng, 카카오맵 URL 을 미리 만들어 두고,
+# /recommend 응답의 장소별 고정 부분도 JSON bytes 조각(fragment)으로 미리 직렬화해 둔다.
+#
+# 갱신 신호
+#   - catalog_meta 컬렉션의 {"_id": "travels", "version": ...} 문서 (travels 수정 후 version 을 올림)
+#     check_seconds 마다 한 번 확인, 문서가 없으면 travels 문서 수로 대신 판단
+#   - change_stream=True: travels 변경 스트림 감시 (replica set 필요, 실패하면 위 폴링만 사용)
+#     감시 스레드는 첫 조회 때 워커 프로세스마다 시작된다
+#   - refresh(): 수동 갱신
+
+TRAVEL_FIELDS = {
+    "_id": 0, "travel_id": 1, "name": 1, "image_urls": 1, "image_url": 1,
+    "location": 1, "address": 1, "short_description": 1,
+}
+
+
+def build_map_url(name, lat, lng):
+    enc_name = quote(name or "", safe="")
+    return f"https://map.kakao.com/link/map/{enc_name},{lat},{lng}"
+
+
+def normalize_image_urls(meta):
+    raw = meta.get("image_urls")
+    # 1. 배열이면 그대로
+    if isinstance(raw, list):
+        return raw
+    # 2. 문자열이면 콤마 기준으로 나눔
+    if isinstance(raw, str) and raw.strip():
+        return [url.strip() for url in raw.split(",")]
+    # 3. 단일 값 image_url만 있는 경우
+    if meta.get("image_url"):
+        return [meta.get("image_url")]
+    # 4. 아무것도 없을 때
+    return []
+
+
+def build_entry(doc):
+    """travels 문서 → 캐시 항목 (응답에 바로 쓰는 필드를 미리 계산)"""
+    loc = doc.get("location") or {}
+    lat, lng = loc.get("lat"), loc.get("lng")
+    entry = {
+        "travel_id": doc["travel_id"],
+        "name": doc.get("name"),
+        "image_urls": normalize_image_urls(doc),
+        "image_urls_raw": doc.get("image_urls"),  # 저장된 원본 (/mypage 응답 형식 유지용)
+        "location": {"lat": lat, "lng": lng},
+        "map_url": build_map_url(doc.get("name"), lat, lng),
+        "address": doc.get("address"),
+        "short_description": doc.get("short_description"),
+    }
+    # 추천 응답의 장소 객체에서 scores 를 뺀 앞부분 (닫는 괄호 없음)
+    entry["fragment"] = open_object({k: entry[k] for k in ("travel_id", "name", "image_urls", "location", "map_url")})
+    return entry
+
+
+class TravelMetaCache:
+
+    def __init__(self, check_seconds=60, change_stream=False):
+        self.check_seconds = check_seconds
+        self.change_stream = change_stream
+        self._entries = {}
+        self._missing = set()  # travels 에 없는 id (매 요청 DB 조회 방지)
+        self._version = None
+        self._loaded_at = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stale = False
+        self._watcher = None
+        self._watcher_pid = None
+        self.db_fallbacks = 0
+        self.reloads = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def _current_version(self):
+        doc = mongo.db.catalog_meta.find_one({"_id": "travels"}, {"version": 1})
+        if doc is not None:
+            return ("version", doc.get("version"))
+        return ("count", mongo.db.travels.estimated_document_count())
+
+    def refresh(self):
+        """travels 전체를 한 번에 읽어 교체 (읽는 쪽은 잠금 없이 이전 dict 를 계속 사용)"""
+        with self._lock:
+            return self._reload()
+
+    def _reload(self, version=None):
+        """_lock 을 잡은 상태에서 호출"""
+        # 읽는 도중 들어온 변경 신호는 다음 갱신에 반영되도록 먼저 내린다
+        self._stale = False
+        version = version or self._current_version()
+        entries = {d["travel_id"]: build_entry(d) for d in mongo.db.travels.find({}, TRAVEL_FIELDS)
+                   if d.get("travel_id") is not None}
+        self._entries = entries
+        self._missing = set()
+        self._version = version
+        self._loaded_at = time.time()
+        self._checked_at = time.time()
+        self.reloads += 1
+        return len(entries)
+
+    def _maybe_refresh(self):
+        """
+        동시에 여러 요청이 갱신 조건을 만나도 다시 읽는 건 한 번 (single-flight).
+        처음 적재 전에는 잠금을 기다리고, 이미 적재된 뒤에는 다른 스레드가 갱신 중이면 이전 dict 로 응답한다.
+        """
+        if self.change_stream:
+            self.start_change_stream()
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self._reload()
+            return
+        if self._stale:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._stale:
+                        self._reload()
+                finally:
+                    self._lock.release()
+            return
+        now = time.time()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        try:
+            version = self._current_version()
+        except Exception as e:
+            print("[WARN] travel cache version check failed:", e)
+            return
+        if version != self._version and self._lock.acquire(blocking=False):
+            try:
+                if version != self._version:
+                    self._reload(version)
+            finally:
+                self._lock.release()
+
+    def get_many(self, travel_ids):
+        """travel_id 목록 → {travel_id: 항목}. 캐시에 없는 id 만 DB 에서 읽어 채운다"""
+        try:
+            self._maybe_refresh()
+        except Exception as e:
+            print("[WARN] travel cache refresh failed:", e)
+
+        entries = self._entries
+        out = {}
+        missing = []
+        for tid in travel_ids:
+            meta = entries.get(tid)
+            if meta is not None:
+                out[tid] = meta
+            elif tid not in self._missing:
+                missing.append(tid)
+
+        if missing:
+            self.db_fallbacks += 1
+            for d in mongo.db.travels.find({"travel_id": {"$in": missing}}, TRAVEL_FIELDS):
+                entry = build_entry(d)
+                entries[entry["travel_id"]] = entry
+                out[entry["travel_id"]] = entry
+            self._missing.update(tid for tid in missing if tid not in out)
+        return out
+
+    # 변경 스트림 (replica set / Atlas 에서만 동작)
+    def start_change_stream(self):
+        if self._watcher_pid == os.getpid():
+            return  # 이 프로세스에서 이미 시도함 (지원 안 되는 서버면 폴링만)
+        self._watcher_pid = os.getpid()
+
+        def watch():
+            try:
+                with mongo.db.travels.watch() as stream:
+                    for _ in stream:
+                        self._stale = True
+            except Exception as e:
+                print("[WARN] travels change stream unavailable, polling only:", e)
+
+        self._watcher = threading.Thread(target=watch, name="travel-cache-watch", daemon=True)
+        self._watcher.start()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "loaded_at": self._loaded_at,
+            "version": list(self._version) if self._version else None,
+            "reloads": self.reloads,
+            "db_fallbacks": self.db_fallbacks,
+            "check_seconds": self.check_seconds,
+            "change_stream": self.change_stream,
+        }
+
+
+travel_cache = TravelMetaCache()
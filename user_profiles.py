@@ -0,0 +1,113 @@
+from extensions import mongo
+from pymongo.errors import DuplicateKeyError
+from project_root1.user_profile import UserProfile
+import datetime
+
+
+# 사용자 선호 프로필 (user_profiles 컬렉션, _id = user_id)
+#
+# 별점/북마크를 쓸 때마다 바뀐 장소만큼만 프로필을 갱신한다 (장소 1개당 O(d), 이력 재조회 없음).
+# 문서: {dim, vec(float32 bytes), weight, tag_counts, ratings{travel_id: 별점}, bookmarks[], version, updated_at}
+# 같은 사용자의 동시 갱신은 version 비교 후 교체(낙관적 잠금)로 처리하고, 충돌하면 다시 읽어서 재시도.
+# /recommend 는 _id 로 vec/weight/dim 만 읽는다.
+
+MAX_RETRIES = 5
+
+
+class UserProfileStore:
+
+    def __init__(self, recommender):
+        self.recommender = recommender
+        self.updates = 0
+        self.conflicts = 0
+        self.errors = 0
+
+    @property
+    def dim(self):
+        store = self.recommender.embedding_store
+        return store.dim if store is not None else None
+
+    def get_vector(self, user_oid):
+        """추천용 정규화 프로필 벡터 (없거나 평가가 부족하면 None)"""
+        if not self.recommender.personalization_enabled or self.dim is None:
+            return None
+        doc = mongo.db.user_profiles.find_one({"_id": user_oid}, {"vec": 1, "weight": 1, "dim": 1})
+        return UserProfile.vector_from_doc(doc, self.dim, self.recommender.profile_min_weight)
+
+    def update(self, user_oid, ratings=None, bookmarks=None):
+        """
+        ratings: {travel_id: 새 별점}, bookmarks: {travel_id: True(추가)/False(해제)}
+        실패해도 별점/북마크 저장에는 영향 없이 경고만 남긴다.
+        """
+        ratings = ratings or {}
+        bookmarks = bookmarks or {}
+        if (not ratings and not bookmarks) or self.dim is None:
+            return
+        try:
+            features = self.recommender.profile_features(list(ratings) + list(bookmarks))
+            for _ in range(MAX_RETRIES):
+                doc = mongo.db.user_profiles.find_one({"_id": user_oid})
+                profile = UserProfile.from_doc(doc, self.dim, self.recommender.profile_bookmark_weight)
+                for tid, score in ratings.items():
+                    if tid in features:
+                        profile.apply_rating(tid, score, *features[tid])
+                for tid, added in bookmarks.items():
+                    if tid in features:
+                        profile.apply_bookmark(tid, added, *features[tid])
+                if self._save(user_oid, profile, doc):
+                    self.updates += 1
+                    return
+                self.conflicts += 1
+            print(f"[WARN] user profile update gave up after {MAX_RETRIES} conflicts:", user_oid)
+        except Exception as e:
+            self.errors += 1
+            print("[WARN] user profile update failed:", e)
+
+    def _save(self, user_oid, profile, doc):
+        """읽은 뒤 다른 요청이 먼저 바꿨으면 False (재시도)"""
+        fields = dict(profile.to_doc(), updated_at=datetime.datetime.utcnow())
+        if doc is None:
+            try:
+                mongo.db.user_profiles.insert_one(dict(fields, _id=user_oid, version=1))
+                return True
+            except DuplicateKeyError:
+                return False
+        # 차원이 바뀐 예전 프로필(dim 불일치)도 version 기준으로 새 프로필로 교체
+        result = mongo.db.user_profiles.update_one(
+            {"_id": user_oid, "version": doc.get("version", 0)},
+            {"$set": dict(fields, version=doc.get("version", 0) + 1)}
+        )
+        return result.matched_count == 1
+
+    def rebuild(self, user_oid):
+        """ratings/bookmarks 이력으로 프로필을 처음부터 다시 계산 (임베딩/카탈로그 교체 후 등)"""
+        ratings = {r["travel_id"]: float(r.get("score") or 0.0)
+                   for r in mongo.db.ratings.find({"user_id": user_oid}, {"travel_id": 1, "score": 1})}
+        bookmarks = [b["travel_id"] for b in mongo.db.bookmarks.find({"user_id": user_oid}, {"travel_id": 1})]
+        features = self.recommender.profile_features(list(ratings) + bookmarks)
+
+        profile = UserProfile(self.dim, self.recommender.profile_bookmark_weight)
+        for tid, score in ratings.items():
+            if tid in features:
+                profile.apply_rating(tid, score, *features[tid])
+        for tid in bookmarks:
+            if tid in features:
+                profile.apply_bookmark(tid, True, *features[tid])
+
+        doc = mongo.db.user_profiles.find_one({"_id": user_oid}, {"version": 1})
+        version = (doc or {}).get("version", 0) + 1
+        mongo.db.user_profiles.update_one(
+            {"_id": user_oid},
+            {"$set": dict(profile.to_doc(), version=version, updated_at=datetime.datetime.utcnow())},
+            upsert=True
+        )
+        return profile
+
+    def stats(self):
+        return {
+            "enabled": self.recommender.personalization_enabled,
+            "weight": self.recommender.personal_w,
+            "updates": self.updates,
+            "conflicts": self.conflicts,
+            "errors": self.errors,
+        }
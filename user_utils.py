@@ -1,6 +1,8 @@
 from extensions import mongo
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_pool import password_hasher
+from db_indexes import users_unique_ready
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import datetime
 
 
@@ -9,17 +11,31 @@ import datetime
 def get_user_by_username(username):
     return mongo.db.users.find_one({"username": username})
 
-def username_exists(username):
-    return mongo.db.users.find_one({"username": username}) is not None
-
-def email_exists(email):
-    return mongo.db.users.find_one({"email": email}) is not None
+def duplicate_field(err):
+    """DuplicateKeyError / BulkWriteError 항목 → 중복된 필드 이름 ("username" / "email", 모르면 None)"""
+    details = err if isinstance(err, dict) else (getattr(err, "details", None) or {})
+    key = details.get("keyPattern") or details.get("keyValue")
+    if key:
+        return next(iter(key))
+    msg = str(details.get("errmsg") or err)
+    for field in ("username", "email"):
+        if f"{field}_unique" in msg or f"{{ {field}:" in msg:
+            return field
+    return None
 
 
 # 사용자 생성
+# 중복 체크는 users 의 username / email unique 인덱스(db_indexes)에 맡김 → 중복이면 DuplicateKeyError
+# 인덱스가 아직 없으면(기존 중복 데이터로 생성 실패 등) insert 전에 조회해서 같은 DuplicateKeyError 를 낸다
 
 def create_user(username, email, password, name):
-    hashed_pw = generate_password_hash(password)
+    if not users_unique_ready():
+        for field, value in (("username", username), ("email", email)):
+            if mongo.db.users.find_one({field: value}, {"_id": 1}) is not None:
+                raise DuplicateKeyError(f"{field}_unique dup key", 11000,
+                                        {"keyPattern": {field: 1}, "keyValue": {field: value}})
+
+    hashed_pw = password_hasher.hash(password)  # 해시 계산은 프로세스 풀에서
     user = {
         "username": username,
         "email": email,
@@ -30,10 +46,62 @@ def create_user(username, email, password, name):
     return str(result.inserted_id)
 
 
+# 계정 일괄 가져오기 (기존 서비스 계정 이전)
+# records: [{"username", "email", "name", "password" 또는 "password_hash"}]
+# password_hash 는 werkzeug 형식 그대로 저장 (방식이 다르면 첫 로그인 때 교체됨)
+# insert_many(ordered=False): 중복 계정은 건너뛰고 나머지는 계속 저장
+
+IMPORT_CHUNK = 1000
+
+def import_users(records):
+    invalid, docs, plain = [], [], []
+    for i, r in enumerate(records):
+        if not isinstance(r, dict) or not all(r.get(k) for k in ("username", "email", "name")) \
+                or not (r.get("password") or r.get("password_hash")):
+            invalid.append(i)
+            continue
+        doc = {"username": r["username"], "email": r["email"], "password": r.get("password_hash"), "name": r["name"]}
+        if not doc["password"]:
+            plain.append((len(docs), r["password"]))
+        docs.append((i, doc))
+
+    # 평문 비밀번호는 프로세스 풀에서 한꺼번에 해시
+    for (pos, _), hashed in zip(plain, password_hasher.hash_many(p for _, p in plain)):
+        docs[pos][1]["password"] = hashed
+
+    inserted, duplicates = 0, []
+    for start in range(0, len(docs), IMPORT_CHUNK):
+        chunk = docs[start:start + IMPORT_CHUNK]
+        try:
+            inserted += len(mongo.db.users.insert_many([d for _, d in chunk], ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            inserted += e.details.get("nInserted", 0)
+            for err in e.details.get("writeErrors", []):
+                if err.get("code") != 11000:
+                    raise
+                duplicates.append({"index": chunk[err["index"]][0], "field": duplicate_field(err)})
+
+    return {"inserted": inserted, "duplicates": duplicates, "invalid": invalid}
+
+
 # 비밀번호 체크
 
 def check_user_password(user, password):
-    return check_password_hash(user['password'], password)
+    if not password_hasher.verify(user.get('password'), password):
+        return False
+
+    # 예전 방식(해시 비용)으로 저장된 비밀번호는 로그인 성공 시 현재 방식으로 교체
+    if password_hasher.needs_rehash(user['password']):
+        try:
+            new_hash = password_hasher.hash(password)
+            mongo.db.users.update_one(
+                {"_id": user["_id"], "password": user["password"]},  # 그 사이 바뀌었으면 건드리지 않음
+                {"$set": {"password": new_hash}}
+            )
+            password_hasher.note_rehash()
+        except Exception as e:
+            print("[WARN] password rehash failed:", e)  # 로그인 자체는 성공 처리
+    return True
 
 
 # travel_id
@@ -0,0 +1,6 @@
+# 운영 WSGI 진입점
+#   gunicorn -c gunicorn.conf.py wsgi:app
+# (app.py 의 app.run 은 로컬 개발용)
+from app import app
+
+__all__ = ["app"]